@@ -0,0 +1,127 @@
+"""Persistent cache of results, kept under the user's cache directory."""
+
+import json
+import os
+import sqlite3
+import stat
+import time
+from collections.abc import Iterable
+from typing import Any
+
+MAX_ENTRIES = 1_000_000
+
+# files modified this recently may still change within the same mtime
+_RACY_SECS = 2
+_BATCH_SIZE = 500
+
+
+def cache_dir() -> str:
+    """Directory where Blossy keeps its caches."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "blossy")
+
+
+def file_key(kind: str, info: os.stat_result) -> str | None:
+    """Key identifying a version of a file, or None if it isn't safe to cache."""
+    if not stat.S_ISREG(info.st_mode):
+        return None
+    if time.time_ns() - info.st_mtime_ns < _RACY_SECS * 1_000_000_000:
+        return None
+    return f"{kind}:{info.st_dev}:{info.st_ino}:{info.st_size}:{info.st_mtime_ns}"
+
+
+class Cache:
+    """
+    Key-value store backed by SQLite, evicting the least recently used entries.
+
+    The cache is best effort: if its database can't be used, every lookup
+    misses and nothing is stored.
+    """
+
+    def __init__(self, name: str, max_entries: int = MAX_ENTRIES) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._max_entries = max_entries
+        try:
+            os.makedirs(cache_dir(), exist_ok=True)
+            self._conn = sqlite3.connect(
+                os.path.join(cache_dir(), f"{name}.sqlite3"), timeout=10
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                + "(key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS by_use ON entries (used)")
+        except (OSError, sqlite3.Error):
+            self._conn = None
+
+    def __enter__(self) -> "Cache":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Look up several keys at once, returning only the ones found."""
+        keys = list(keys)
+        found = {}
+        if self._conn is not None:
+            try:
+                for i in range(0, len(keys), _BATCH_SIZE):
+                    batch = keys[i : i + _BATCH_SIZE]
+                    marks = ", ".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, value FROM entries WHERE key IN ({marks})", batch
+                    ).fetchall()
+                    # decoding the whole batch at once is much faster than row by row
+                    values = json.loads(
+                        "[" + ",".join(value for _, value in rows) + "]"
+                    )
+                    found.update(zip((key for key, _ in rows), values))
+                    self._conn.execute(
+                        f"UPDATE entries SET used = ? WHERE key IN ({marks})",
+                        [time.time(), *batch],
+                    )
+                self._conn.commit()
+            except sqlite3.Error:
+                found = {}
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: dict[str, Any]) -> None:
+        """Store several values at once."""
+        if self._conn is None:
+            return
+        now = time.time()
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, used) VALUES (?, ?, ?)",
+                ((key, json.dumps(value), now) for key, value in items.items()),
+            )
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """Evict the entries over the limit and save the changes."""
+        if self._conn is None:
+            return
+        try:
+            (qt_entries,) = self._conn.execute(
+                "SELECT COUNT(*) FROM entries"
+            ).fetchone()
+            if qt_entries > self._max_entries:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    + "(SELECT key FROM entries ORDER BY used LIMIT ?)",
+                    (qt_entries - self._max_entries,),
+                )
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
+        finally:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,178 @@
+"""
+Thin client that runs Blossy commands in the 'blossy serve' daemon, falling
+back to running them in this process when the daemon isn't running. It
+imports as little as possible, so it starts quickly.
+"""
+
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+
+# requests are the length of their fields, then the fields separated by
+# NUL, sent along with the client's standard streams; responses are the pid
+# of the process that runs the command, then its exit code
+HEADER = struct.Struct("!I")
+STATUS = struct.Struct("!i")
+# pid, uid and gid of the process at the other end of a Unix socket
+PEERCRED = struct.Struct("3i")
+
+# variables that change how the commands behave, the only ones sent to the
+# daemon along with the ones named in BLOSSY_FORWARD_ENV (comma-separated)
+FORWARDED_ENV = (
+    "HOME",
+    "LANG",
+    "LANGUAGE",
+    "TERM",
+    "COLUMNS",
+    "LINES",
+    "NO_COLOR",
+    "FORCE_COLOR",
+    "TZ",
+    "TMPDIR",
+    "XDG_CACHE_HOME",
+    "XDG_STATE_HOME",
+    "XDG_RUNTIME_DIR",
+)
+# locale variables and the ones of shell completion
+FORWARDED_PREFIXES = ("LC_", "COMP_", "_BLOSSY_", "_TYPER_")
+
+
+class UntrustedSocketError(Exception):
+    """Raised when the socket, or who listens on it, isn't the user's own."""
+
+
+def socket_path() -> str:
+    """
+    Path of the socket where the daemon listens, in the user's runtime
+    directory or, without one, in a directory of the user under the
+    temporary one.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, f"blossy-{os.getuid()}.sock")
+    base = os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(base, f"blossy-{os.getuid()}", "blossy.sock")
+
+
+def make_socket_dir(path: str) -> None:
+    """
+    Create the directory of the socket at 'path', only accessible by the
+    user, if it doesn't exist. Raises UntrustedSocketError if it exists but
+    others could replace the socket.
+    """
+    directory = os.path.dirname(path)
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    _check_dir(directory)
+
+
+def check_socket(path: str) -> None:
+    """
+    Raise UntrustedSocketError unless the socket at 'path' and its directory
+    belong to the user and only the user can replace the socket.
+    """
+    _check_dir(os.path.dirname(path))
+    info = os.lstat(path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise UntrustedSocketError(f"'{path}' isn't a socket of the user")
+
+
+def check_peer(sock: socket.socket) -> None:
+    """Raise UntrustedSocketError unless the user runs the other end of 'sock'."""
+    try:
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, PEERCRED.size)
+    except (AttributeError, OSError) as e:
+        # without a way to know who is at the other end, it isn't trusted
+        raise UntrustedSocketError("the owner of the daemon can't be checked") from e
+    _, uid, _ = PEERCRED.unpack(creds)
+    if uid != os.getuid():
+        raise UntrustedSocketError(f"the daemon is run by another user ({uid})")
+
+
+def forwarded_env() -> dict[str, str]:
+    """Variables of the environment sent to the daemon."""
+    names = set(FORWARDED_ENV)
+    names.update(filter(None, os.environ.get("BLOSSY_FORWARD_ENV", "").split(",")))
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if name in names or name.startswith(FORWARDED_PREFIXES)
+    }
+
+
+def encode_request(argv: list[str], cwd: str, env: dict[str, str]) -> bytes:
+    """Fields of a request: the directory, the arguments and the environment."""
+    fields = [cwd, str(len(argv)), *argv, *(f"{k}={v}" for k, v in env.items())]
+    return b"\0".join(map(os.fsencode, fields))
+
+
+def decode_request(data: bytes) -> tuple[list[str], str, dict[str, str]]:
+    """Arguments, directory and environment of a request."""
+    cwd, qt_args, *fields = map(os.fsdecode, data.split(b"\0"))
+    argv = fields[: int(qt_args)]
+    env = dict(field.split("=", 1) for field in fields[int(qt_args) :])
+    return argv, cwd, env
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    """Receive 'size' bytes, failing if the connection ends before that."""
+    data = b""
+    while len(data) < size:
+        part = sock.recv(size - len(data))
+        if not part:
+            raise ConnectionError("connection closed by the other end")
+        data += part
+    return data
+
+
+def main() -> None:
+    """Entry point of 'blossy-client', which takes the same arguments as 'blossy'."""
+    path = socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        # nothing is sent before both the socket and the daemon are checked
+        check_socket(path)
+        sock.connect(path)
+        check_peer(sock)
+    except (OSError, UntrustedSocketError) as e:
+        sock.close()
+        if isinstance(e, UntrustedSocketError):
+            print(f"blossy-client: not using the daemon, {e}.", file=sys.stderr)
+        from .main import app
+
+        app(prog_name="blossy")
+        return
+
+    with sock:
+        sys.exit(_run(sock, sys.argv[1:]))
+
+
+def _run(sock: socket.socket, argv: list[str]) -> int:
+    request = encode_request(argv, os.getcwd(), forwarded_env())
+    socket.send_fds(sock, [HEADER.pack(len(request)) + request], [0, 1, 2])
+
+    (pid,) = STATUS.unpack(recv_exactly(sock, STATUS.size))
+    while True:
+        try:
+            (code,) = STATUS.unpack(recv_exactly(sock, STATUS.size))
+            return code
+        except KeyboardInterrupt:
+            # the command runs in another process group, so it's told here
+            os.kill(pid, signal.SIGINT)
+
+
+def _check_dir(directory: str) -> None:
+    # others can't replace what's in a directory of the user that only the
+    # user can write to
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    ):
+        raise UntrustedSocketError(f"'{directory}' isn't a private directory")
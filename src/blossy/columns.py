@@ -0,0 +1,363 @@
+"""
+Columns of numbers and times, to calculate an expression over many values at
+once. NumPy arrays are used when NumPy is installed, 'array' arrays otherwise.
+
+Numbers are float64 values along with a mask of the ones that are ints, and
+times are int64 seconds, so the results are the same as calculating with
+Python's ints and floats. When they wouldn't be, like for ints beyond 2**53
+or a division by zero, the operations raise ColumnError.
+"""
+
+import math
+import operator
+from array import array
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from .durations import parse_seconds
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ints up to this magnitude are exact as floats
+EXACT_LIMIT = 2.0**53
+
+
+class ColumnError(ArithmeticError):
+    """Raised when a column can't be calculated like its values one by one."""
+
+
+@dataclass
+class Numbers:
+    """Column of numbers, where 'ints' tells which values are ints."""
+
+    values: Any
+    ints: Any
+
+
+def numbers(values: list[int | float]) -> Numbers:
+    """Column of the numbers."""
+    return _backend.numbers(values)
+
+
+def times(seconds: list[int]) -> Any:
+    """Column of the times, given in seconds."""
+    return _backend.times(seconds)
+
+
+def number_list(column: Numbers) -> list[int | float]:
+    """Values of a column of numbers."""
+    return [
+        int(value) if is_int else value
+        for value, is_int in zip(column.values.tolist(), column.ints.tolist())
+    ]
+
+
+def time_list(column: Any) -> list[int]:
+    """Values of a column of times, in seconds."""
+    return column.tolist()
+
+
+class TimeVector:
+    """
+    Durations kept as a column of seconds, to calculate with many of them
+    without a Time object for each one. Like Time, they're formatted as
+    H:MM:SS and scaled times are truncated to whole seconds.
+    """
+
+    __slots__ = ("seconds",)
+
+    def __init__(self, seconds: Any) -> None:
+        self.seconds = seconds
+
+    @classmethod
+    def from_seconds(cls, seconds: list[int]) -> "TimeVector":
+        """Vector of the durations, given in seconds."""
+        return cls(times(seconds))
+
+    @classmethod
+    def parse(cls, texts: list[str]) -> "TimeVector":
+        """
+        Vector of durations written as [-][H:]MM:SS, with optional spaces
+        around them. Raises ValueError if one of them isn't a duration.
+        """
+        return cls(times(list(map(parse_seconds, texts))))
+
+    def format(self) -> list[str]:
+        """Durations written as [-]H:MM:SS."""
+        return _backend.format_times(self.seconds)
+
+    def sum(self) -> int:
+        """Total of the durations, in seconds."""
+        return _backend.sum_times(self.seconds)
+
+    def __len__(self) -> int:
+        return len(self.seconds)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(time_list(self.seconds))
+
+    def __add__(self, other: "TimeVector") -> "TimeVector":
+        if isinstance(other, TimeVector):
+            return TimeVector(add_times(self.seconds, other.seconds))
+        return NotImplemented
+
+    def __sub__(self, other: "TimeVector") -> "TimeVector":
+        if isinstance(other, TimeVector):
+            return TimeVector(subtract_times(self.seconds, other.seconds))
+        return NotImplemented
+
+    def __mul__(self, factor: int | float) -> "TimeVector":
+        if isinstance(factor, (int, float)):
+            factors = numbers([factor] * len(self.seconds))
+            return TimeVector(scale_time(self.seconds, factors))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor: int | float) -> "TimeVector":
+        if isinstance(divisor, (int, float)):
+            divisors = numbers([divisor] * len(self.seconds))
+            return TimeVector(divide_time(self.seconds, divisors))
+        return NotImplemented
+
+    def __neg__(self) -> "TimeVector":
+        return TimeVector(negate_time(self.seconds))
+
+
+def _format_time(sign: str, hours: int, minutes: int, seconds: int) -> str:
+    return f"{sign}{hours}:{minutes:02}:{seconds:02}"
+
+
+class _NumpyBackend:
+    def numbers(self, values: list[int | float]) -> Numbers:
+        try:
+            column = Numbers(
+                np.array(values, dtype=np.float64),
+                np.fromiter((type(v) is int for v in values), bool, len(values)),
+            )
+        except OverflowError as e:
+            raise ColumnError("number too large") from e
+        return self._exact(column)
+
+    def times(self, seconds: list[int]) -> Any:
+        try:
+            column = np.array(seconds, dtype=np.int64)
+        except OverflowError as e:
+            raise ColumnError("time too large") from e
+        return self._exact_time(column)
+
+    def add(self, left: Numbers, right: Numbers) -> Numbers:
+        return self._arithmetic(np.add, left, right)
+
+    def subtract(self, left: Numbers, right: Numbers) -> Numbers:
+        return self._arithmetic(np.subtract, left, right)
+
+    def multiply(self, left: Numbers, right: Numbers) -> Numbers:
+        return self._arithmetic(np.multiply, left, right)
+
+    def divide(self, left: Numbers, right: Numbers) -> Numbers:
+        values = self._float_op(np.true_divide, left.values, right.values)
+        return Numbers(values, np.zeros(len(values), bool))
+
+    def power(self, left: Numbers, right: Numbers) -> Numbers:
+        # ints to negative powers are floats in Python
+        ints = left.ints & right.ints & (right.values >= 0)
+        values = self._float_op(np.power, left.values, right.values)
+        return self._exact(Numbers(values, ints))
+
+    def negate(self, column: Numbers) -> Numbers:
+        return Numbers(0 - column.values, column.ints)
+
+    def add_times(self, left: Any, right: Any) -> Any:
+        return self._exact_time(left + right)
+
+    def subtract_times(self, left: Any, right: Any) -> Any:
+        return self._exact_time(left - right)
+
+    def scale_time(self, seconds: Any, factors: Numbers) -> Any:
+        scaled = self._float_op(np.multiply, seconds.astype(np.float64), factors.values)
+        return self._truncate(scaled)
+
+    def divide_time(self, seconds: Any, divisors: Numbers) -> Any:
+        divided = self._float_op(
+            np.true_divide, seconds.astype(np.float64), divisors.values
+        )
+        return self._truncate(divided)
+
+    def negate_time(self, seconds: Any) -> Any:
+        return 0 - seconds
+
+    def format_times(self, seconds: Any) -> list[str]:
+        # the parts are split for all of the values at once
+        minutes, secs = np.divmod(np.abs(seconds), 60)
+        hours, minutes = np.divmod(minutes, 60)
+        signs = np.where(seconds < 0, "-", "").tolist()
+        return list(
+            map(_format_time, signs, hours.tolist(), minutes.tolist(), secs.tolist())
+        )
+
+    def sum_times(self, seconds: Any) -> int:
+        # sums of int64 wrap around instead of growing like Python's ints
+        if np.abs(seconds).sum(dtype=np.float64) < 2.0**62:
+            return int(np.sum(seconds, dtype=np.int64))
+        return sum(seconds.tolist())
+
+    def _arithmetic(self, op: Callable, left: Numbers, right: Numbers) -> Numbers:
+        values = self._float_op(op, left.values, right.values)
+        return self._exact(Numbers(values, left.ints & right.ints))
+
+    def _float_op(self, op: Callable, left: Any, right: Any) -> Any:
+        # Python raises errors where NumPy would only warn
+        try:
+            with np.errstate(all="raise"):
+                return op(left, right)
+        except FloatingPointError as e:
+            raise ColumnError(str(e)) from e
+
+    def _truncate(self, seconds: Any) -> Any:
+        if not (np.abs(seconds) < EXACT_LIMIT).all():
+            raise ColumnError("time too large")
+        return np.trunc(seconds).astype(np.int64)
+
+    def _exact(self, column: Numbers) -> Numbers:
+        if (column.ints & (np.abs(column.values) >= EXACT_LIMIT)).any():
+            raise ColumnError("number too large")
+        # ints have no negative zero, which products like 0 * -4 give as floats
+        column.values[column.ints & (column.values == 0)] = 0.0
+        return column
+
+    def _exact_time(self, seconds: Any) -> Any:
+        if (np.abs(seconds) >= EXACT_LIMIT).any():
+            raise ColumnError("time too large")
+        return seconds
+
+
+class _ArrayBackend:
+    def numbers(self, values: list[int | float]) -> Numbers:
+        try:
+            column = Numbers(
+                array("d", values), array("b", [type(v) is int for v in values])
+            )
+        except OverflowError as e:
+            raise ColumnError("number too large") from e
+        return self._exact(column)
+
+    def times(self, seconds: list[int]) -> Any:
+        try:
+            column = array("q", seconds)
+        except OverflowError as e:
+            raise ColumnError("time too large") from e
+        return self._exact_time(column)
+
+    def add(self, left: Numbers, right: Numbers) -> Numbers:
+        return self._arithmetic(operator.add, left, right)
+
+    def subtract(self, left: Numbers, right: Numbers) -> Numbers:
+        return self._arithmetic(operator.sub, left, right)
+
+    def multiply(self, left: Numbers, right: Numbers) -> Numbers:
+        return self._arithmetic(operator.mul, left, right)
+
+    def divide(self, left: Numbers, right: Numbers) -> Numbers:
+        values = self._float_op(operator.truediv, left.values, right.values)
+        return Numbers(values, array("b", bytes(len(values))))
+
+    def power(self, left: Numbers, right: Numbers) -> Numbers:
+        # ints to negative powers are floats in Python
+        ints = array(
+            "b",
+            [
+                left_int and right_int and exponent >= 0
+                for left_int, right_int, exponent in zip(
+                    left.ints, right.ints, right.values
+                )
+            ],
+        )
+        values = self._float_op(operator.pow, left.values, right.values)
+        return self._exact(Numbers(values, ints))
+
+    def negate(self, column: Numbers) -> Numbers:
+        return Numbers(array("d", [0 - value for value in column.values]), column.ints)
+
+    def add_times(self, left: Any, right: Any) -> Any:
+        return self._exact_time(array("q", map(operator.add, left, right)))
+
+    def subtract_times(self, left: Any, right: Any) -> Any:
+        return self._exact_time(array("q", map(operator.sub, left, right)))
+
+    def scale_time(self, seconds: Any, factors: Numbers) -> Any:
+        return self._truncate(self._float_op(operator.mul, seconds, factors.values))
+
+    def divide_time(self, seconds: Any, divisors: Numbers) -> Any:
+        return self._truncate(
+            self._float_op(operator.truediv, seconds, divisors.values)
+        )
+
+    def negate_time(self, seconds: Any) -> Any:
+        return array("q", [0 - second for second in seconds])
+
+    def format_times(self, seconds: Any) -> list[str]:
+        formatted = []
+        for second in seconds:
+            minutes, secs = divmod(abs(second), 60)
+            hours, minutes = divmod(minutes, 60)
+            sign = "-" if second < 0 else ""
+            formatted.append(_format_time(sign, hours, minutes, secs))
+        return formatted
+
+    def sum_times(self, seconds: Any) -> int:
+        return sum(seconds)
+
+    def _arithmetic(self, op: Callable, left: Numbers, right: Numbers) -> Numbers:
+        values = self._float_op(op, left.values, right.values)
+        ints = array("b", map(operator.and_, left.ints, right.ints))
+        return self._exact(Numbers(values, ints))
+
+    def _float_op(self, op: Callable, left: Any, right: Any) -> Any:
+        # the values are floats, as with NumPy, even the ones that are ints
+        try:
+            return array("d", map(op, map(float, left), right))
+        except (ArithmeticError, TypeError) as e:
+            # TypeError: complex results, like the roots of negative numbers
+            raise ColumnError(str(e)) from e
+
+    def _truncate(self, seconds: Any) -> Any:
+        if not all(abs(second) < EXACT_LIMIT for second in seconds):
+            raise ColumnError("time too large")
+        return array("q", map(math.trunc, seconds))
+
+    def _exact(self, column: Numbers) -> Numbers:
+        if any(
+            is_int and abs(value) >= EXACT_LIMIT
+            for value, is_int in zip(column.values, column.ints)
+        ):
+            raise ColumnError("number too large")
+        # ints have no negative zero, which products like 0 * -4 give as floats
+        for i, (value, is_int) in enumerate(zip(column.values, column.ints)):
+            if is_int and value == 0:
+                column.values[i] = 0.0
+        return column
+
+    def _exact_time(self, seconds: Any) -> Any:
+        if any(abs(second) >= EXACT_LIMIT for second in seconds):
+            raise ColumnError("time too large")
+        return seconds
+
+
+_backend = _NumpyBackend() if np is not None else _ArrayBackend()
+
+add = _backend.add
+subtract = _backend.subtract
+multiply = _backend.multiply
+divide = _backend.divide
+power = _backend.power
+negate = _backend.negate
+add_times = _backend.add_times
+subtract_times = _backend.subtract_times
+scale_time = _backend.scale_time
+divide_time = _backend.divide_time
+negate_time = _backend.negate_time
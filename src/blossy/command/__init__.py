@@ -1,6 +1,7 @@
-"""Package for all Blossy commands."""
-
-from . import calculate, count_chars, count_lines, percentage, random_cmd, standardize
+"""
+Package for all Blossy commands. The modules aren't imported here, so that
+only the module of the command being used is loaded (see 'blossy.main').
+"""
 
 __all__ = [
     "calculate",
@@ -8,5 +9,7 @@ __all__ = [
     "count_lines",
     "percentage",
     "random_cmd",
+    "serve",
     "standardize",
+    "stats",
 ]
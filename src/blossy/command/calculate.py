@@ -1,20 +1,45 @@
 """'calc' command of the Blossy CLI."""
 
-from collections.abc import Generator, Iterable
-from dataclasses import dataclass
+import contextlib
+import csv
+import itertools
+import json
+import math
+import operator
+import os
+import re
+import shutil
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from collections.abc import Callable, Generator, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from types import ModuleType
+from typing import Any, TextIO
 
 import typer
-from sly import Lexer, Parser
-from sly.lex import Token
-from sly.yacc import YaccProduction
+from sly.lex import Lexer, LexError, Token
 from typing_extensions import Annotated
 
+from ..durations import parse_seconds
+
+# lines of results written at once in batches
+_BATCH_LINES = 4096
+# results kept in memory, and on disk with --cache
+_MEMO_SIZE = 65536
+_STORED_RESULTS = 100_000
+# as many digits as Python converts to text by default
+MAX_DIGITS = 4300
+# rows of tables calculated at once
+_TABLE_ROWS = 65536
+
 
-# TODO: ditch sly, cause WTF
 def execute(
     expression: Annotated[
-        str, typer.Argument(show_default=False, help="Expression to be calculated.")
-    ],
+        str | None,
+        typer.Argument(show_default=False, help="Expression to be calculated."),
+    ] = None,
     visualize: Annotated[
         bool,
         typer.Option(
@@ -23,6 +48,85 @@ def execute(
             help="Show a visualization using postfix notation and a stack.",
         ),
     ] = False,
+    no_pause: Annotated[
+        bool,
+        typer.Option(
+            "--no-pause",
+            help="Show every step of the visualization at once, without waiting "
+            + "for Enter (the default when the standard input isn't a terminal).",
+        ),
+    ] = False,
+    visual_format: Annotated[
+        str,
+        typer.Option(
+            "--format",
+            help="Format of the visualization: 'text', or 'ndjson' for one JSON "
+            + "object per step (which doesn't pause).",
+        ),
+    ] = "text",
+    window: Annotated[
+        int | None,
+        typer.Option(
+            show_default=False,
+            help="Show only this quantity of values at the top of the stack and "
+            + "at the start of the input in the visualization.",
+        ),
+    ] = None,
+    max_digits: Annotated[
+        int,
+        typer.Option(
+            help="Stop calculations that would make numbers with more digits "
+            + "(which also bounds the memory they take)."
+        ),
+    ] = MAX_DIGITS,
+    timeout: Annotated[
+        float | None,
+        typer.Option(
+            show_default=False,
+            help="Stop calculations that take more seconds than this.",
+        ),
+    ] = None,
+    cache: Annotated[
+        bool,
+        typer.Option(
+            help="Reuse the results of expressions calculated in previous runs."
+        ),
+    ] = False,
+    cache_stats: Annotated[
+        bool,
+        typer.Option(
+            "--cache-stats",
+            help="Report how many results were reused to the standard error.",
+        ),
+    ] = False,
+    batch: Annotated[
+        str | None,
+        typer.Option(
+            "--batch",
+            "-b",
+            show_default=False,
+            help="Calculate each line of a file ('-' for the standard input), "
+            + "reporting the errors of each line without stopping.",
+        ),
+    ] = None,
+    csv_file: Annotated[
+        str | None,
+        typer.Option(
+            "--csv",
+            show_default=False,
+            help="Calculate the expression for each row of a CSV file "
+            + "('-' for the standard input), using its columns as variables.",
+        ),
+    ] = None,
+    ndjson_file: Annotated[
+        str | None,
+        typer.Option(
+            "--ndjson",
+            show_default=False,
+            help="Calculate the expression for each line of an NDJSON file "
+            + "('-' for the standard input), using its keys as variables.",
+        ),
+    ] = None,
 ):
     """
     CALCULATE
@@ -53,33 +157,288 @@ def execute(
     • Time * Number = Time\n
     • Number * Time = Time\n
     • Time / Number = Time\n
+
+    Tables given with --csv or --ndjson have one result per row, and the
+    expression may use their columns as variables, like 'rate * (end - start)'.
     """
+    if max_digits < 1:
+        raise typer.BadParameter("Maximum of digits must be positive.")
+    if timeout is not None and timeout <= 0:
+        raise typer.BadParameter("Timeout must be positive.")
+    budget = Budget(max_digits, timeout)
+    if max_digits > sys.get_int_max_str_digits() > 0:
+        # otherwise results this long couldn't be shown
+        sys.set_int_max_str_digits(max_digits)
+
+    if csv_file is not None or ndjson_file is not None:
+        if csv_file is not None and ndjson_file is not None:
+            raise typer.BadParameter("Give either a CSV or an NDJSON file.")
+        if expression is None or batch is not None:
+            raise typer.BadParameter("Give an expression to calculate for the table.")
+        if visualize:
+            raise typer.BadParameter("Tables can't be visualized.")
+        try:
+            with _open_batch(csv_file or ndjson_file) as source:
+                if csv_file is not None:
+                    reader = csv.DictReader(source)
+                    rows, header = reader, reader.fieldnames or []
+                else:
+                    rows, header = _read_ndjson(source), None
+                qt_errors = calculate_table(
+                    expression, rows, sys.stdout, sys.stderr, header, budget
+                )
+        except FileNotFoundError as e:
+            raise typer.BadParameter(f"'{e.filename}' does not exist.") from e
+        except IsADirectoryError as e:
+            raise typer.BadParameter(f"'{e.filename}' is not a file.") from e
+        except (LexError, ParsingError) as e:
+            raise typer.BadParameter(str(e)) from e
+        if qt_errors:
+            raise typer.Exit(1)
+        return
+
+    if (expression is None) == (batch is None):
+        raise typer.BadParameter("Give either an expression or a batch file.")
+    if batch is not None:
+        if visualize:
+            raise typer.BadParameter("Batches can't be visualized.")
+        try:
+            with _open_batch(batch) as source, ResultCache(cache, budget) as results:
+                qt_errors = calculate_batch(source, sys.stdout, sys.stderr, results)
+        except FileNotFoundError as e:
+            raise typer.BadParameter(f"'{e.filename}' does not exist.") from e
+        except IsADirectoryError as e:
+            raise typer.BadParameter(f"'{e.filename}' is not a file.") from e
+        if cache_stats:
+            _print_cache_stats(results)
+        if qt_errors:
+            raise typer.Exit(1)
+        return
+
+    if visual_format not in ("text", "ndjson"):
+        raise typer.BadParameter("Format must be 'text' or 'ndjson'.")
+    if window is not None and window < 1:
+        raise typer.BadParameter("Window must be positive.")
+
     try:
         if visualize:
             lexer = ExpressionLexer()
             parser = PostfixedExpressionParser()
             postfixed_expr: tuple[str] = parser.parse(lexer.tokenize(expression))
 
-            for step in visualize_calc(postfixed_expr):
-                if step.operation:
-                    print(f"> {step.operation}")
-                if step.stack and step.input:
-                    print()
-                    _print_with_padding(step.stack, step.input)
-                input()
+            pause = not no_pause and visual_format == "text" and sys.stdin.isatty()
+            steps = visualize_calc(postfixed_expr, window, budget)
+            _write_steps(steps, visual_format, pause)
             return
 
-        lexer = ExpressionLexer()
-        parser = ExpressionParser()
-        result: int | float = parser.parse(lexer.tokenize(expression))
+        with ResultCache(cache, budget) as results:
+            (result,) = results.calculate_many([expression])
+        if cache_stats:
+            _print_cache_stats(results)
+        if isinstance(result, Exception):
+            raise result
         print(result)
     except Exception as e:
         raise typer.BadParameter(str(e)) from e
 
 
+def calculate_batch(
+    source: TextIO,
+    output: TextIO,
+    errors: TextIO,
+    results: "ResultCache | None" = None,
+) -> int:
+    """
+    Calculate each line of 'source', writing one line of 'output' for each
+    one: the result, or nothing for blank lines and lines with errors, which
+    are reported to 'errors'. Returns the quantity of errors. Results are
+    looked up in 'results', when it's given, before being calculated.
+    """
+    results = results or ResultCache()
+    # results are written a few at a time, unless someone is reading them live
+    lines_per_write = 1 if output.isatty() else _BATCH_LINES
+    qt_errors = 0
+    for first_line, lines in _batches(source, lines_per_write):
+        expressions = [line.rstrip("\n") for line in lines if not line.isspace()]
+        calculated = iter(results.calculate_many(expressions))
+        outputs = []
+        for line_number, line in enumerate(lines, first_line):
+            result = "" if line.isspace() else next(calculated)
+            if isinstance(result, Exception):
+                qt_errors += 1
+                errors.write(f"Line {line_number}: {result}\n")
+                result = ""
+            outputs.append(result)
+        output.write("\n".join(outputs) + "\n")
+
+    output.flush()
+    return qt_errors
+
+
+class ResultCache:
+    """
+    Results of expressions, with the most recently used ones kept in memory
+    and, if 'persistent', all of them kept in a Cache (see 'blossy.cache')
+    too. Expressions are looked up with their runs of spaces collapsed, which
+    tells apart their tokens without lexing them. Only results are kept, as
+    the indices in error messages depend on the spaces.
+    """
+
+    def __init__(
+        self,
+        persistent: bool = False,
+        budget: "Budget | None" = None,
+        size: int = _MEMO_SIZE,
+    ) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._budget = budget or Budget()
+        self._memo: OrderedDict[str, str] = OrderedDict()
+        self._size = size
+        self._store = None
+        if persistent:
+            # imported here, as most calculations don't need it
+            from ..cache import Cache
+
+            self._store = Cache("calc", _STORED_RESULTS)
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def calculate_many(self, expressions: list[str]) -> list[str | Exception]:
+        """Results of the expressions, or the errors they raised."""
+        # results with more digits are kept apart, as they aren't always allowed
+        keys = [
+            f"{self._budget.max_digits}:"
+            + " ".join(filter(None, expression.split(" ")))
+            for expression in expressions
+        ]
+        found = {}
+        for key in keys:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                found[key] = self._memo[key]
+        if self._store is not None:
+            found.update(self._store.get_many(set(keys) - found.keys()))
+
+        lexer = ExpressionLexer()
+        parser = ExpressionParser(budget=self._budget)
+        results = []
+        calculated = {}
+        for expression, key in zip(expressions, keys):
+            if key in found:
+                self.hits += 1
+                results.append(found[key])
+                continue
+            self.misses += 1
+            try:
+                result = str(parser.parse(lexer.tokenize(expression)))
+            except Exception as e:
+                results.append(e)
+                continue
+            # repeats in the same call are found from now on
+            found[key] = calculated[key] = result
+            results.append(result)
+
+        for key, result in found.items():
+            self._memo[key] = result
+        while len(self._memo) > self._size:
+            self._memo.popitem(last=False)
+        if self._store is not None and calculated:
+            self._store.put_many(calculated)
+        return results
+
+    def close(self) -> None:
+        """Save the results kept in the persistent cache."""
+        if self._store is not None:
+            self._store.close()
+
+
+def _print_cache_stats(results: ResultCache) -> None:
+    print(
+        f"Cache hits: {results.hits}, misses: {results.misses}",
+        file=sys.stderr,
+    )
+
+
+def calculate_table(
+    expression: str,
+    rows: Iterable[dict[str, Any]],
+    output: TextIO,
+    errors: TextIO,
+    header: Iterable[str] | None = None,
+    budget: "Budget | None" = None,
+) -> int:
+    """
+    Calculate an expression with variables for each row of a table, given as
+    dicts of its columns, writing one line of 'output' for each one like
+    'calculate_batch'. The expression is compiled once for the types of the
+    columns and calculated over whole columns, a batch of rows at a time, and
+    the rows that go over the limits of 'budget' are reported like in
+    'calculate_batch'. Raises ParsingError if the expression is invalid, if its parts without
+    variables can't be calculated or if it uses a variable that isn't in
+    'header', when it's given.
+    """
+    budget = budget or Budget()
+    tokens = list(VariableExpressionLexer().tokenize(expression))
+    try:
+        build_syntax_tree(iter(tokens), budget=budget.start())
+    except ArithmeticError as e:
+        # the parts without variables are calculated here, and fail every row
+        raise ParsingError(str(e)) from e
+    if header is not None:
+        header = set(header)
+        for token in tokens:
+            if token.type == "NAME" and token.value not in header:
+                _undefined(token)
+
+    names = {token.value for token in tokens if token.type == "NAME"}
+    compiled: dict[tuple[tuple[str, str], ...], CompiledExpression] = {}
+    qt_errors = 0
+    for first_row, batch in _batches(rows, _TABLE_ROWS):
+        try:
+            results = _calculate_columns(tokens, names, batch, compiled, budget)
+        except Exception:
+            # one row at a time, which is slower but finds the rows with errors
+            results = []
+            for row_number, row in enumerate(batch, first_row):
+                try:
+                    value = _calculate_row(tokens, names, row, budget)
+                    results.append(str(value))
+                except Exception as e:
+                    results.append("")
+                    qt_errors += 1
+                    errors.write(f"Row {row_number}: {e}\n")
+        output.write("\n".join(results) + "\n")
+
+    output.flush()
+    return qt_errors
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[tuple[int, list[Any]]]:
+    # batches paired with the number of their first item
+    items = iter(items)
+    first = 1
+    while batch := list(itertools.islice(items, size)):
+        yield first, batch
+        first += len(batch)
+
+
+def _open_batch(path: str) -> contextlib.AbstractContextManager[TextIO]:
+    if path == "-":
+        # not closed afterwards, as it's only borrowed
+        return contextlib.nullcontext(sys.stdin)
+    return open(os.path.join(os.getcwd(), path), encoding="utf-8")
+
+
 class Time:
     """Custom time class supporting arithmetic operations."""
 
+    __slots__ = ("_total_secs",)
+
     def __init__(self, hours: int = 0, minutes: int = 0, seconds: int = 0) -> None:
         absolute = abs(seconds) + abs(minutes) * 60 + abs(hours) * 60 * 60
         if hours < 0 or minutes < 0 or seconds < 0:
@@ -87,6 +446,13 @@ class Time:
         else:
             self._total_secs = absolute
 
+    @classmethod
+    def from_seconds(cls, seconds: int) -> "Time":
+        """Time of the given (signed) seconds, without normalizing its parts."""
+        time = object.__new__(cls)
+        time._total_secs = seconds
+        return time
+
     @property
     def hours(self) -> int:
         """Hours component in HH:MM:SS display format."""
@@ -124,51 +490,84 @@ class Time:
 
     def __add__(self, other):
         if isinstance(other, Time):
-            return Time(seconds=self.total_seconds + other.total_seconds)
+            return Time.from_seconds(self.total_seconds + other.total_seconds)
         raise TypeError(
             f"unsupported operand type(s) for +: 'Time' and '{type(other).__name__}'"
         )
 
     def __sub__(self, other):
         if isinstance(other, Time):
-            return Time(seconds=self.total_seconds - other.total_seconds)
+            return Time.from_seconds(self.total_seconds - other.total_seconds)
         raise TypeError(
             f"unsupported operand type(s) for -: 'Time' and '{type(other).__name__}'"
         )
 
     def __mul__(self, other):
         if isinstance(other, (int, float)):
-            return Time(seconds=int(self.total_seconds * other))
+            return Time.from_seconds(int(self.total_seconds * other))
         raise TypeError(
             f"unsupported operand type(s) for *: 'Time' and '{type(other).__name__}'"
         )
 
     def __rmul__(self, other):
         if isinstance(other, (int, float)):
-            return Time(seconds=int(self.total_seconds * other))
+            return Time.from_seconds(int(self.total_seconds * other))
         raise TypeError(
             f"unsupported operand type(s) for *: '{type(other).__name__}' and 'Time'"
         )
 
     def __truediv__(self, other):
         if isinstance(other, (int, float)):
-            return Time(seconds=int(self.total_seconds / other))
+            return Time.from_seconds(int(self.total_seconds / other))
         raise TypeError(
             f"unsupported operand type(s) for /: 'Time' and '{type(other).__name__}'"
         )
 
     def __str__(self):
-        if self.total_seconds < 0:
-            return f"-{abs(self.hours)}:{abs(self.minutes):02}:{abs(self.seconds):02}"
-        return f"{abs(self.hours)}:{abs(self.minutes):02}:{abs(self.seconds):02}"
+        minutes, seconds = divmod(abs(self._total_secs), 60)
+        hours, minutes = divmod(minutes, 60)
+        sign = "-" if self._total_secs < 0 else ""
+        return f"{sign}{hours}:{minutes:02}:{seconds:02}"
+
+
+@dataclass(slots=True)
+class Node:
+    """
+    Represents a node of the syntax tree of an expression, which is kept as
+    the list of its nodes in postfix order, with their arity (0 for operands)
+    and type, if known. Constants, including the folded operations on them,
+    have their value too.
+    """
+
+    token: Token
+    arity: int
+    type: str | None
+    value: Any = None
+    # index where the part of the expression of binary operations starts
+    start: int = 0
 
 
 @dataclass
-class ExpressionResult:
-    """Represents the result of parsing an expression for visualization."""
+class CompiledExpression:
+    """Represents an expression compiled to be calculated over columns."""
 
-    value: tuple[str] | str
     type: str
+    # postfix steps, with their arity (0 for operands, which take the
+    # variables and the length of the columns)
+    steps: list[tuple[int, Callable[..., Any]]]
+
+    def evaluate(self, variables: dict[str, Any], length: int) -> Any:
+        """Value of the expression over the columns of the variables."""
+        stack = []
+        for arity, step in self.steps:
+            if arity == 0:
+                stack.append(step(variables, length))
+            elif arity == 1:
+                stack[-1] = step(stack[-1])
+            else:
+                right = stack.pop()
+                stack[-1] = step(stack[-1], right)
+        return stack.pop()
 
 
 @dataclass
@@ -217,16 +616,33 @@ class ExpressionLexer(Lexer):
     R_PARENTH = r"\)"
 
 
-class ExpressionParser(Parser):
-    """Parser for mathematical expressions with time."""
+class VariableExpressionLexer(ExpressionLexer):
+    """Lexer for mathematical expressions with time and variables."""
 
-    tokens = ExpressionLexer.tokens
+    tokens = ExpressionLexer.tokens + ("NAME",)
 
-    precedence = (
-        ("left", "PLUS", "MINUS"),
-        ("left", "TIMES", "DIVIDE"),
-        ("right", "EXPONENT", "UNARY_PLUS", "UNARY_MINUS"),
-    )
+    NAME = r"[A-Za-z_][A-Za-z0-9_]*"
+
+
+class _PrecedenceParser(ABC):
+    """
+    Precedence-climbing parser for mathematical expressions with time, which
+    reduces operations in the same order (and so reports the same errors) as
+    an LALR parser with the precedence rules below.
+    """
+
+    # binding power of each operator, the unary ones are as strong as '^'
+    precedence = {
+        "PLUS": 1,
+        "MINUS": 1,
+        "TIMES": 2,
+        "DIVIDE": 2,
+        "EXPONENT": 3,
+        "UNARY": 3,
+    }
+    right_assoc = {3}
+
+    operands = {"TIME_CONST", "INT_CONST", "FLOAT_CONST", "NAME"}
 
     def error(self, token: Token | None) -> None:
         if token:
@@ -235,337 +651,680 @@ class ExpressionParser(Parser):
             )
         raise ParsingError("Operation absent or used incorrectly near the end of input")
 
-    @_("expression")
-    def start(self, prod: YaccProduction) -> Time | int | float:
-        return prod.expression
+    def parse(self, tokens: Iterator[Token]) -> Any:
+        """Parse the tokens, returning the value of the whole expression."""
+        # values paired with the index where their part of the expression starts
+        values: list[tuple[Any, int]] = []
+        # pending '(' and operator tokens, paired with whether they're unary
+        pending: list[tuple[Token, bool]] = []
+
+        for token in tokens:
+            # expecting an operand, maybe after '(' or unary operators
+            if token.type in ("PLUS", "MINUS"):
+                pending.append((token, True))
+                continue
+            if token.type == "L_PARENTH":
+                pending.append((token, False))
+                continue
+            if token.type not in self.operands:
+                self.error(token)
+            values.append((self.operand(token), token.index))
+
+            # expecting operators or ')' that follow the operand
+            for token in tokens:
+                if token.type in self.operands or token.type == "L_PARENTH":
+                    self.error(token)
+                self._reduce(values, pending, token)
+                if token.type != "R_PARENTH":
+                    pending.append((token, False))
+                    break
+                if not pending:
+                    self.error(token)
+                l_parenth, _ = pending.pop()
+                values[-1] = (values[-1][0], l_parenth.index)
+            else:
+                self._reduce(values, pending, None)
+                if pending:
+                    self.error(None)
+                return values.pop()[0]
+
+        self.error(None)
+
+    def _reduce(
+        self,
+        values: list[tuple[Any, int]],
+        pending: list[tuple[Token, bool]],
+        lookahead: Token | None,
+    ) -> None:
+        # operations that bind stronger than the lookahead operator (all of
+        # them at ')' or at the end of input) are applied, innermost first
+        if lookahead is None or lookahead.type == "R_PARENTH":
+            level = 0
+        else:
+            level = self.precedence[lookahead.type]
+
+        while pending and pending[-1][0].type != "L_PARENTH":
+            token, unary = pending[-1]
+            top_level = self.precedence["UNARY" if unary else token.type]
+            if top_level < level or (top_level == level and level in self.right_assoc):
+                return
+            pending.pop()
+            if unary:
+                value, _ = values.pop()
+                values.append((self.unary(token, value), token.index))
+            else:
+                right, _ = values.pop()
+                left, start = values.pop()
+                values.append((self.binary(token, left, right, start), start))
+
+    @abstractmethod
+    def operand(self, token: Token) -> Any:
+        """Value of a constant."""
+
+    @abstractmethod
+    def unary(self, operator: Token, value: Any) -> Any:
+        """Value of a unary operation."""
+
+    @abstractmethod
+    def binary(self, operator: Token, left: Any, right: Any, start: int) -> Any:
+        """Value of a binary operation starting at the index 'start'."""
+
+
+def _check_types(operator: Token, left: str, right: str, start: int) -> str:
+    # type ('time' or 'number') of an operation on values of the given types
+    match operator.type:
+        case "PLUS":
+            if left == "time" and right == "number":
+                raise ParsingError(f"Number being added to time near index {start}")
+            if left == "number" and right == "time":
+                raise ParsingError(f"Time being added to number near index {start}")
+        case "MINUS":
+            if left == "time" and right == "number":
+                raise ParsingError(
+                    "Number being subtracted from time " + f"near index {start}"
+                )
+            if left == "number" and right == "time":
+                raise ParsingError(
+                    "Time being subtracted from number " + f"near index {start}"
+                )
+        case "TIMES":
+            if left == "time" and right == "time":
+                raise ParsingError(f"Time being multiplied by time near index {start}")
+        case "DIVIDE":
+            if right == "time":
+                raise ParsingError(f"Time used as divisor near index {start}")
+        case _:
+            if left == "time" or right == "time":
+                raise ParsingError(
+                    f"Operation {operator.value} used with time "
+                    + f"near index {start}"
+                )
 
-    @_("expression PLUS expression")
-    def expression(self, prod: YaccProduction) -> Time | int | float:
-        if isinstance(prod.expression0, Time) and not isinstance(
-            prod.expression1, Time
-        ):
-            raise ParsingError(
-                "Number being added to time " + f"near index {prod.index}"
-            )
-        if not isinstance(prod.expression0, Time) and isinstance(
-            prod.expression1, Time
-        ):
-            raise ParsingError(
-                "Time being added to number " + f"near index {prod.index}"
-            )
+    if operator.type == "TIMES" and right == "time":
+        return "time"
+    return left
 
-        return prod.expression0 + prod.expression1
 
-    @_("expression MINUS expression")
-    def expression(self, prod: YaccProduction) -> Time | int | float:
-        if isinstance(prod.expression0, Time) and not isinstance(
-            prod.expression1, Time
-        ):
-            raise ParsingError(
-                "Number being subtracted from time " + f"near index {prod.index}"
-            )
-        if not isinstance(prod.expression0, Time) and isinstance(
-            prod.expression1, Time
-        ):
-            raise ParsingError(
-                "Time being subtracted from number " + f"near index {prod.index}"
-            )
+def _type_of(value: Time | int | float) -> str:
+    return "time" if isinstance(value, Time) else "number"
 
-        return prod.expression0 - prod.expression1
 
-    @_("expression TIMES expression")
-    def expression(self, prod: YaccProduction) -> Time | int | float:
-        if isinstance(prod.expression0, Time) and isinstance(prod.expression1, Time):
-            raise ParsingError(
-                "Time being multiplied by time " + f"near index {prod.index}"
-            )
+def _undefined(name: Token) -> None:
+    raise ParsingError(f"Variable {name.value} not defined near index {name.index}")
 
-        return prod.expression0 * prod.expression1
 
-    @_("expression DIVIDE expression")
-    def expression(self, prod: YaccProduction) -> Time | int | float:
-        if isinstance(prod.expression1, Time):
-            raise ParsingError(f"Time used as divisor near index {prod.index}")
+class _SyntaxTreeBuilder(_PrecedenceParser):
+    """
+    Parser for building the syntax tree of an expression, checking the types
+    of its operations unless the types of its variables are unknown (None).
+    With a 'budget', operations on constants are calculated right away.
+    """
 
-        return prod.expression0 / prod.expression1
+    def __init__(self, types: dict[str, str] | None, budget: "Budget | None") -> None:
+        self.types = types
+        self.budget = budget
+        self.nodes: list[Node] = []
+
+    def operand(self, token: Token) -> str | None:
+        if token.type != "NAME":
+            node_type = "time" if token.type == "TIME_CONST" else "number"
+            self.nodes.append(Node(token, 0, node_type, _to_operand(token)))
+            return node_type
+
+        if self.types is None:
+            node_type = None
+        elif token.value in self.types:
+            node_type = self.types[token.value]
+        else:
+            _undefined(token)
+        self.nodes.append(Node(token, 0, node_type))
+        return node_type
+
+    def unary(self, operator: Token, value: str | None) -> str | None:
+        if self.budget and self._is_constant(-1):
+            if operator.type == "MINUS":
+                folded = _negate(self.nodes[-1].value)
+                self.nodes[-1] = Node(operator, 0, value, folded)
+            return value
+        self.nodes.append(Node(operator, 1, value))
+        return value
 
-    @_("expression EXPONENT expression")
-    def expression(self, prod: YaccProduction) -> int | float:
-        if isinstance(prod.expression0, Time) or isinstance(prod.expression1, Time):
-            raise ParsingError(
-                f"Operation {prod.EXPONENT} used with time "
-                + f"near index {prod.index}"
+    def binary(
+        self, operator: Token, left: str | None, right: str | None, start: int
+    ) -> str | None:
+        if left is None or right is None:
+            node_type = None
+        else:
+            node_type = _check_types(operator, left, right, start)
+
+        # the right operand is the last node, so a constant left one is next
+        if self.budget and self._is_constant(-1) and self._is_constant(-2):
+            right_node = self.nodes.pop()
+            left_node = self.nodes.pop()
+            folded = self.budget.apply(
+                operator.type, left_node.value, right_node.value, start
             )
+            self.nodes.append(Node(operator, 0, node_type, folded))
+        else:
+            self.nodes.append(Node(operator, 2, node_type, start=start))
+        return node_type
 
-        return prod.expression0**prod.expression1
-
-    @_("PLUS expression %prec UNARY_PLUS")
-    def expression(self, prod: YaccProduction) -> Time | int | float:
-        return prod.expression
+    def _is_constant(self, position: int) -> bool:
+        if len(self.nodes) < -position:
+            return False
+        node = self.nodes[position]
+        return node.arity == 0 and node.token.type != "NAME"
 
-    @_("MINUS expression %prec UNARY_MINUS")
-    def expression(self, prod: YaccProduction) -> Time | int | float:
-        if isinstance(prod.expression, Time):
-            return Time() - prod.expression
-        return 0 - prod.expression
 
-    @_("L_PARENTH expression R_PARENTH")
-    def expression(self, prod: YaccProduction) -> Time | int | float:
-        return prod.expression
+def build_syntax_tree(
+    tokens: Iterator[Token],
+    types: dict[str, str] | None = None,
+    budget: "Budget | None" = None,
+) -> list[Node]:
+    """
+    Syntax tree of an expression, as the list of its nodes in postfix order,
+    which the back ends ('evaluate', 'PostfixedExpressionParser' and
+    'compile_columns') go through in linear time. The types of the operations
+    are checked when the types of the variables are given, and with a
+    started 'budget', the parts without variables are calculated while parsing.
+    """
+    builder = _SyntaxTreeBuilder(types, budget)
+    builder.parse(tokens)
+    return builder.nodes
 
-    @_("operand")
-    def expression(self, prod: YaccProduction) -> Time | int | float:
-        return prod.operand
 
-    @_("TIME_CONST")
-    def operand(self, prod: YaccProduction) -> Time:
-        parts = tuple(map(int, prod.TIME_CONST.split(":")))
-        if len(parts) == 3:
-            value = Time(hours=parts[-3], minutes=parts[-2], seconds=parts[-1])
+def evaluate(
+    nodes: list[Node],
+    variables: dict[str, Time | int | float] | None = None,
+    budget: "Budget | None" = None,
+) -> Time | int | float:
+    """
+    Value of an expression, from its syntax tree with the types checked,
+    within a started 'budget' (by default, the default one started now).
+    """
+    variables = variables or {}
+    budget = budget or Budget().start()
+    stack: list[Time | int | float] = []
+    for node in nodes:
+        if node.arity == 2:
+            right = stack.pop()
+            stack[-1] = budget.apply(node.token.type, stack[-1], right, node.start)
+        elif node.arity == 1:
+            if node.token.type == "MINUS":
+                stack[-1] = _negate(stack[-1])
+        elif node.token.type == "NAME":
+            stack.append(variables[node.token.value])
         else:
-            value = Time(minutes=parts[-2], seconds=parts[-1])
+            stack.append(node.value)
+    return stack.pop()
 
-        return value
 
-    @_("INT_CONST")
-    def operand(self, prod: YaccProduction) -> int:
-        return int(prod.INT_CONST)
+_OPERATIONS = {
+    "PLUS": operator.add,
+    "MINUS": operator.sub,
+    "TIMES": operator.mul,
+    "DIVIDE": operator.truediv,
+    "EXPONENT": operator.pow,
+}
 
-    @_("FLOAT_CONST")
-    def operand(self, prod: YaccProduction) -> float:
-        return float(prod.FLOAT_CONST)
 
+def _negate(value: Time | int | float) -> Time | int | float:
+    if isinstance(value, Time):
+        return Time.from_seconds(0 - value.total_seconds)
+    return 0 - value
 
-class PostfixedExpressionParser(Parser):
-    """Parser for converting expressions with time to postfixed notation."""
 
-    tokens = ExpressionLexer.tokens
+def _to_operand(token: Token) -> Time | int | float:
+    if token.type == "TIME_CONST":
+        parts = tuple(map(int, token.value.split(":")))
+        if len(parts) == 3:
+            return Time(hours=parts[-3], minutes=parts[-2], seconds=parts[-1])
+        return Time(minutes=parts[-2], seconds=parts[-1])
+    if token.type == "INT_CONST":
+        return int(token.value)
+    return float(token.value)
 
-    precedence = (
-        ("left", "PLUS", "MINUS"),
-        ("left", "TIMES", "DIVIDE"),
-        ("right", "EXPONENT", "UNARY_PLUS", "UNARY_MINUS"),
-    )
 
-    def error(self, token: Token | None) -> None:
-        if token:
+class Budget:
+    """
+    Limits of a calculation: the digits of its numbers, which also bound the
+    memory they take, and the seconds it may take since it was started. The
+    operations that could go over them raise ParsingError before running.
+    """
+
+    def __init__(
+        self, max_digits: int = MAX_DIGITS, max_seconds: float | None = None
+    ) -> None:
+        self.max_digits = max_digits
+        self.max_seconds = max_seconds
+        self._deadline = None
+
+    def start(self) -> "Budget":
+        """Start counting the time of a calculation, returning the budget."""
+        if self.max_seconds is not None:
+            self._deadline = time.monotonic() + self.max_seconds
+        return self
+
+    def apply(
+        self,
+        operator_type: str,
+        left: Time | int | float,
+        right: Time | int | float,
+        start: int | None = None,
+    ) -> Time | int | float:
+        """Value of a binary operation starting at the index 'start', if known."""
+        # only ints grow without bounds, floats raise OverflowError instead
+        match operator_type:
+            case "TIMES":
+                digits = _log10(left) + _log10(right)
+            case "EXPONENT" if type(left) is int and type(right) is int and right > 0:
+                digits = right * _log10(left)
+            case _:
+                digits = 0
+        if digits >= self.max_digits:
+            symbol = PostfixedExpressionParser.symbols[operator_type]
+            where = "" if start is None else f" near index {start}"
             raise ParsingError(
-                f"Operation absent or used incorrectly near index {token.index}"
+                f"Operation {symbol} would give a number with over "
+                + f"{self.max_digits} digits{where}"
             )
-        raise ParsingError("Operation absent or used incorrectly near the end of input")
 
-    @_("expression")
-    def start(self, prod: YaccProduction) -> tuple[str]:
-        return prod.expression.value
+        result = _OPERATIONS[operator_type](left, right)
+        self.check_time()
+        return result
 
-    @_("expression PLUS expression")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        if prod.expression0.type == "time" and prod.expression1.type == "number":
-            raise ParsingError(
-                "Number being added to time " + f"near index {prod.index}"
-            )
-        if prod.expression0.type == "number" and prod.expression1.type == "time":
-            raise ParsingError(
-                "Time being added to number " + f"near index {prod.index}"
-            )
+    def check_time(self) -> None:
+        """Raise ParsingError if the calculation took over its seconds."""
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise ParsingError(f"Calculation took over {self.max_seconds} seconds")
 
-        return ExpressionResult(
-            value=prod.expression0.value + prod.expression1.value + ("+₂",),
-            type=prod.expression0.type,
-        )
 
-    @_("expression MINUS expression")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        if prod.expression0.type == "time" and prod.expression1.type == "number":
-            raise ParsingError(
-                "Number being subtracted from time " + f"near index {prod.index}"
-            )
-        if prod.expression0.type == "number" and prod.expression1.type == "time":
-            raise ParsingError(
-                "Time being subtracted from number " + f"near index {prod.index}"
-            )
+def _log10(value: Time | int | float) -> float:
+    # digits of an int (minus one, about), or 0 when it can't grow
+    if isinstance(value, Time):
+        value = value.total_seconds
+    if type(value) is not int or -1 <= value <= 1:
+        return 0
+    return math.log10(abs(value))
 
-        return ExpressionResult(
-            value=prod.expression0.value + prod.expression1.value + ("-₂",),
-            type=prod.expression0.type,
-        )
 
-    @_("expression TIMES expression")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        if prod.expression0.type == "time" and prod.expression1.type == "time":
-            raise ParsingError(
-                "Time being multiplied by time " + f"near index {prod.index}"
-            )
+class ExpressionParser:
+    """Parser for mathematical expressions with time, within a Budget."""
 
-        if prod.expression0.type == "time" or prod.expression1.type == "time":
-            return_type = "time"
-        else:
-            return_type = "number"
+    def __init__(
+        self,
+        variables: dict[str, Time | int | float] | None = None,
+        budget: "Budget | None" = None,
+    ) -> None:
+        self.variables = variables or {}
+        self.budget = budget or Budget()
 
-        return ExpressionResult(
-            value=prod.expression0.value + prod.expression1.value + ("*",),
-            type=return_type,
-        )
+    def parse(self, tokens: Iterator[Token]) -> Time | int | float:
+        types = {name: _type_of(value) for name, value in self.variables.items()}
+        budget = self.budget.start()
+        nodes = build_syntax_tree(tokens, types, budget)
+        return evaluate(nodes, self.variables, budget)
 
-    @_("expression DIVIDE expression")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        if prod.expression1.type == "time":
-            raise ParsingError(f"Time used as divisor near index {prod.index}")
 
-        return ExpressionResult(
-            value=prod.expression0.value + prod.expression1.value + ("/",),
-            type=prod.expression0.type,
-        )
+class PostfixedExpressionParser:
+    """Parser for converting expressions with time to postfixed notation."""
 
-    @_("expression EXPONENT expression")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        if prod.expression0.type == "time" or prod.expression1.type == "time":
-            raise ParsingError(
-                f"Operation {prod.EXPONENT} used with time "
-                + f"near index {prod.index}"
-            )
+    symbols = {
+        "PLUS": "+₂",
+        "MINUS": "-₂",
+        "TIMES": "*",
+        "DIVIDE": "/",
+        "EXPONENT": "^",
+    }
 
-        return ExpressionResult(
-            value=prod.expression0.value + prod.expression1.value + ("^",),
-            type=prod.expression0.type,
-        )
+    def parse(self, tokens: Iterator[Token]) -> tuple[str]:
+        nodes = build_syntax_tree(tokens, {})
+        return tuple(map(self._symbol, nodes))
 
-    @_("PLUS expression %prec UNARY_PLUS")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        return ExpressionResult(
-            value=prod.expression.value + ("+₁",),
-            type=prod.expression.type,
-        )
+    def _symbol(self, node: Node) -> str:
+        if node.arity == 0:
+            return node.token.value
+        if node.arity == 1:
+            return node.token.value + "₁"
+        return self.symbols[node.token.type]
 
-    @_("MINUS expression %prec UNARY_MINUS")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        return ExpressionResult(
-            value=prod.expression.value + ("-₁",),
-            type=prod.expression.type,
-        )
 
-    @_("L_PARENTH expression R_PARENTH")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        return prod.expression
+def compile_columns(nodes: list[Node]) -> CompiledExpression:
+    """
+    Expression compiled to be calculated over columns (see 'blossy.columns'),
+    from its syntax tree with the types checked.
+    """
+    # imported here, as NumPy takes a while to load
+    from .. import columns
+
+    # operations by operator and types of the operands
+    operations: dict[tuple[str, str, str], Callable[[Any, Any], Any]] = {
+        ("PLUS", "number", "number"): columns.add,
+        ("PLUS", "time", "time"): columns.add_times,
+        ("MINUS", "number", "number"): columns.subtract,
+        ("MINUS", "time", "time"): columns.subtract_times,
+        ("TIMES", "number", "number"): columns.multiply,
+        ("TIMES", "time", "number"): columns.scale_time,
+        ("TIMES", "number", "time"): lambda left, right: columns.scale_time(
+            right, left
+        ),
+        ("DIVIDE", "number", "number"): columns.divide,
+        ("DIVIDE", "time", "number"): columns.divide_time,
+        ("EXPONENT", "number", "number"): columns.power,
+    }
 
-    @_("operand")
-    def expression(self, prod: YaccProduction) -> ExpressionResult:
-        return ExpressionResult(
-            value=(prod.operand.value,),
-            type=prod.operand.type,
-        )
+    steps = []
+    types = []
+    for node in nodes:
+        if node.arity == 0:
+            steps.append((0, _column_operand(node, columns)))
+        elif node.arity == 2:
+            right = types.pop()
+            left = types.pop()
+            steps.append((2, operations[(node.token.type, left, right)]))
+        elif node.token.type == "MINUS":
+            types.pop()
+            negate = columns.negate_time if node.type == "time" else columns.negate
+            steps.append((1, negate))
+        else:
+            types.pop()
+        types.append(node.type)
+    return CompiledExpression(types.pop(), steps)
 
-    @_("TIME_CONST")
-    def operand(self, prod: YaccProduction) -> ExpressionResult:
-        return ExpressionResult(
-            value=prod.TIME_CONST,
-            type="time",
-        )
 
-    @_("INT_CONST", "FLOAT_CONST")
-    def operand(self, prod: YaccProduction) -> ExpressionResult:
-        return ExpressionResult(
-            value=getattr(prod, "INT_CONST") or getattr(prod, "FLOAT_CONST"),
-            type="number",
-        )
+def _column_operand(node: Node, columns: ModuleType) -> Callable[[dict, int], Any]:
+    if node.token.type == "NAME":
+        name = node.token.value
+        return lambda variables, length: variables[name]
+    value = node.value
+    if isinstance(value, Time):
+        seconds = value.total_seconds
+        return lambda variables, length: columns.times([seconds] * length)
+    return lambda variables, length: columns.numbers([value] * length)
 
 
-def visualize_calc(postfixed_expr: tuple[str]) -> Generator[VisualCalcStep, None, None]:
-    """Visualize the time calculation steps."""
+def visualize_calc(
+    postfixed_expr: Iterable[str],
+    window: int | None = None,
+    budget: "Budget | None" = None,
+) -> Generator[VisualCalcStep, None, None]:
+    """
+    Visualize the time calculation steps, within a Budget. With a 'window',
+    only that quantity of values at the top of the stack and at the start of
+    the input are shown, so each step takes the same time however long the
+    expression is.
+    """
+    budget = (budget or Budget()).start()
     ops = {
         "unary": ("+₁", "-₁"),
         "binary": ("+₂", "-₂", "*", "/", "^"),
     }
-    state = {
-        "stack": ["$"],
-        "input": list(postfixed_expr) + ["$"],
-    }
+    stack = ["$"]
+    # values of the stack, so results aren't parsed again from their text
+    values: list[Time | int | float] = []
+    remaining = deque(postfixed_expr)
+    remaining.append("$")
 
     yield VisualCalcStep(
-        None, _iter_to_str(state["stack"]), _iter_to_str(state["input"])
+        None, _stack_to_str(stack, window), _input_to_str(remaining, window)
     )
 
-    while len(state["input"]) > 1:
-        value = state["input"].pop(0)
+    while len(remaining) > 1:
+        value = remaining.popleft()
 
         if value in ops["unary"]:
-            operand = state["stack"].pop()
+            operand = stack.pop()
             operator = value
-            result, operation = _handle_unary(operator, operand)
-            state["stack"].append(result)
+            result, operation = _handle_unary(operator, operand, values.pop())
+            values.append(result)
+            stack.append(str(result))
         elif value in ops["binary"]:
-            operand_2 = state["stack"].pop()
-            operand_1 = state["stack"].pop()
+            operand_2 = stack.pop()
+            operand_1 = stack.pop()
             operator = value
-            result, operation = _handle_binary(operator, operand_1, operand_2)
-            state["stack"].append(result)
+            right = values.pop()
+            left = values.pop()
+            result, operation = _handle_binary(
+                operator, (operand_1, left), (operand_2, right), budget
+            )
+            values.append(result)
+            stack.append(str(result))
         else:
-            state["stack"].append(value)
+            values.append(_to_time_or_num(value))
+            stack.append(value)
             operation = f"Stack {value}"
 
-        stack_str = _iter_to_str(state["stack"])
-        input_str = _iter_to_str(state["input"])
+        stack_str = _stack_to_str(stack, window)
+        input_str = _input_to_str(remaining, window)
         yield VisualCalcStep(operation, stack_str, input_str)
 
-    final_result = state["stack"].pop()
-    final_result = _to_time_or_num(final_result)
+    final_result = values.pop()
     yield VisualCalcStep(f"The result is {final_result}", None, None)
 
 
+def _write_steps(
+    steps: Iterable[VisualCalcStep], visual_format: str, pause: bool
+) -> None:
+    # steps are written a few at a time, unless each one waits for Enter
+    lines = []
+    try:
+        for step in steps:
+            if visual_format == "ndjson":
+                lines.append(json.dumps(asdict(step), ensure_ascii=False))
+            else:
+                if step.operation:
+                    lines.append(f"> {step.operation}")
+                if step.stack and step.input:
+                    lines.append("")
+                    lines.append(_with_padding(step.stack, step.input))
+
+            if pause:
+                print("\n".join(lines))
+                lines.clear()
+                input()
+            elif visual_format == "text":
+                # in place of the Enter that would have been pressed
+                lines.append("")
+            if len(lines) >= _BATCH_LINES:
+                sys.stdout.write("\n".join(lines) + "\n")
+                lines.clear()
+    finally:
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+
 def _iter_to_str(iterable: Iterable[str]) -> str:
     return " ".join(iterable)
 
 
+def _stack_to_str(stack: list[str], window: int | None) -> str:
+    if window is None or len(stack) <= window:
+        return _iter_to_str(stack)
+    return "… " + _iter_to_str(stack[-window:])
+
+
+def _input_to_str(remaining: deque[str], window: int | None) -> str:
+    if window is None or len(remaining) <= window:
+        return _iter_to_str(remaining)
+    return _iter_to_str(itertools.islice(remaining, window)) + " …"
+
+
 def _to_time_or_num(value: str) -> Time | int | float:
     if ":" in value:
-        parts = tuple(map(int, value.split(":")))
-        if len(parts) == 3:
-            return Time(hours=parts[-3], minutes=parts[-2], seconds=parts[-1])
-        return Time(minutes=parts[-2], seconds=parts[-1])
+        # negative times like -0:03:00 need their sign handled separately
+        return Time.from_seconds(parse_seconds(value))
     return float(value) if "." in value else int(value)
 
 
-def _handle_unary(operator: str, operand: str) -> tuple[str, str]:
+def _calculate_columns(
+    tokens: list[Token],
+    names: set[str],
+    batch: list[dict[str, Any]],
+    compiled: dict[tuple[tuple[str, str], ...], CompiledExpression],
+    budget: "Budget",
+) -> list[str]:
+    # imported here, as NumPy takes a while to load
+    from .. import columns
+
+    # the ints of columns stop being exact before going over the digits of the
+    # budget, which raises ColumnError for the rows to be calculated one by one,
+    # unless the budget has fewer digits than them
+    if budget.max_digits < math.log10(columns.EXACT_LIMIT):
+        raise ParsingError("Too few digits for columns")
+    if not all(isinstance(row, dict) for row in batch):
+        raise ParsingError("Invalid rows")
+    types = {}
+    variables = {}
+    for name in names:
+        types[name], values = _to_column([row[name] for row in batch])
+        if types[name] == "time":
+            variables[name] = columns.times(values)
+        else:
+            variables[name] = columns.numbers(values)
+
+    signature = tuple(sorted(types.items()))
+    if signature not in compiled:
+        nodes = build_syntax_tree(iter(tokens), types, budget=budget.start())
+        compiled[signature] = compile_columns(nodes)
+    expression = compiled[signature]
+
+    # the whole batch gets the time of a row, and the rows get their own if not
+    budget.start()
+    result = expression.evaluate(variables, len(batch))
+    budget.check_time()
+    if expression.type == "time":
+        return columns.TimeVector(result).format()
+    return list(map(str, columns.number_list(result)))
+
+
+def _calculate_row(
+    tokens: list[Token], names: set[str], row: dict[str, Any], budget: "Budget"
+) -> Time | int | float:
+    if isinstance(row, Exception):
+        raise row
+    variables = {name: _to_value(row[name]) for name in names if name in row}
+    return ExpressionParser(variables, budget).parse(iter(tokens))
+
+
+def _read_ndjson(source: TextIO) -> Iterator[dict[str, Any] | ParsingError]:
+    # lines that aren't objects are errors of their rows, not of the whole table
+    for line in source:
+        if line.isspace():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield ParsingError("Invalid JSON")
+            continue
+        yield row if isinstance(row, dict) else ParsingError("Row isn't an object")
+
+
+# values in tables, which may be negative, and columns of them
+_NUMBER_VALUE = f" *-?(?:{ExpressionLexer.FLOAT_CONST}|{ExpressionLexer.INT_CONST}) *"
+_TIME_VALUE = f" *-?(?:{ExpressionLexer.TIME_CONST}) *"
+_NUMBER_CELL = re.compile(_NUMBER_VALUE)
+_TIME_CELL = re.compile(_TIME_VALUE)
+_NUMBER_COLUMN = re.compile(f"{_NUMBER_VALUE}(?:\n{_NUMBER_VALUE})*")
+_TIME_COLUMN = re.compile(f"{_TIME_VALUE}(?:\n{_TIME_VALUE})*")
+
+
+def _to_value(cell: Any) -> Time | int | float:
+    if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+        return cell
+    if isinstance(cell, str):
+        if _NUMBER_CELL.fullmatch(cell):
+            return float(cell) if "." in cell else int(cell)
+        if _TIME_CELL.fullmatch(cell):
+            return Time.from_seconds(parse_seconds(cell))
+    raise ParsingError(f"Value {json.dumps(cell)} is neither a number nor a time")
+
+
+def _to_column(cells: list[Any]) -> tuple[str, list[int | float]]:
+    # type of a column and its values, which are seconds for times
+    if all(type(cell) is str for cell in cells):
+        # all the cells are checked at once, which is much quicker
+        text = "\n".join(cells)
+        if text.count("\n") == len(cells) - 1:
+            if _NUMBER_COLUMN.fullmatch(text):
+                return "number", [
+                    float(cell) if "." in cell else int(cell) for cell in cells
+                ]
+            if _TIME_COLUMN.fullmatch(text):
+                return "time", list(map(parse_seconds, cells))
+
+    values = list(map(_to_value, cells))
+    if all(isinstance(value, Time) for value in values):
+        return "time", [value.total_seconds for value in values]
+    if any(isinstance(value, Time) for value in values):
+        raise ParsingError("Column with both numbers and times")
+    return "number", values
+
+
+def _handle_unary(
+    operator: str, operand: str, value: Time | int | float
+) -> tuple[Time | int | float, str]:
     match operator:
         case "+₁":
-            result = _to_time_or_num(operand)
+            result = value
             operation = f"+{operand} = {result}"
         case "-₁":
-            if ":" in operand:
-                result = Time() - _to_time_or_num(operand)
-            else:
-                result = 0 - _to_time_or_num(operand)
+            result = _negate(value)
             operation = f"-{operand} = {result}"
         case _:
             raise ValueError(f"unknown operator '{operator}'")
 
-    return str(result), operation
+    return result, operation
 
 
-def _handle_binary(operator: str, operand_1: str, operand_2: str) -> tuple[str, str]:
+def _handle_binary(
+    operator: str,
+    operand_1: tuple[str, Time | int | float],
+    operand_2: tuple[str, Time | int | float],
+    budget: "Budget",
+) -> tuple[Time | int | float, str]:
+    # operands are given as their text and value
+    (text_1, left), (text_2, right) = operand_1, operand_2
     match operator:
         case "+₂":
-            result = _to_time_or_num(operand_1) + _to_time_or_num(operand_2)
-            operation = f"{operand_1} + {operand_2} = {result}"
+            result = budget.apply("PLUS", left, right)
+            operation = f"{text_1} + {text_2} = {result}"
         case "-₂":
-            result = _to_time_or_num(operand_1) - _to_time_or_num(operand_2)
-            operation = f"{operand_1} - {operand_2} = {result}"
+            result = budget.apply("MINUS", left, right)
+            operation = f"{text_1} - {text_2} = {result}"
         case "*":
-            result = _to_time_or_num(operand_1) * _to_time_or_num(operand_2)
-            result = _trim_time_or_num(result)
-            operation = f"{operand_1} * {operand_2} = {result}"
+            result = _trim_time_or_num(budget.apply("TIMES", left, right))
+            operation = f"{text_1} * {text_2} = {result}"
         case "/":
-            result = _to_time_or_num(operand_1) / _to_time_or_num(operand_2)
-            result = _trim_time_or_num(result)
-            operation = f"{operand_1} / {operand_2} = {result}"
+            result = _trim_time_or_num(budget.apply("DIVIDE", left, right))
+            operation = f"{text_1} / {text_2} = {result}"
         case "^":
-            result = _to_time_or_num(operand_1) ** _to_time_or_num(operand_2)
-            result = _trim_time_or_num(result)
-            operation = f"{operand_1}^{operand_2} = {result}"
+            result = _trim_time_or_num(budget.apply("EXPONENT", left, right))
+            operation = f"{text_1}^{text_2} = {result}"
         case _:
             raise ValueError(f"unknown operator '{operator}'")
 
-    return str(result), operation
+    return result, operation
 
 
 def _trim_time_or_num(value: Time | int | float) -> Time | int | float:
@@ -576,10 +1335,10 @@ def _trim_time_or_num(value: Time | int | float) -> Time | int | float:
     return int(value) if value.is_integer() else value
 
 
-def _print_with_padding(left_side: str, right_side: str) -> None:
-    terminal_width = os.get_terminal_size().columns
+def _with_padding(left_side: str, right_side: str) -> str:
+    # the width falls back to 80 columns when the output isn't a terminal
+    terminal_width = shutil.get_terminal_size().columns
     padding = terminal_width - len(left_side) - len(right_side)
     if padding > 0:
-        print(left_side + " " * padding + right_side)
-    else:
-        print(left_side + " " * 2 + right_side)
+        return left_side + " " * padding + right_side
+    return left_side + " " * 2 + right_side
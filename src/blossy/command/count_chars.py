@@ -5,11 +5,18 @@ import os
 import typer
 from typing_extensions import Annotated
 
+from ..scan import STDIN, ScanError, scan_files
+from ..watch import watch_summaries
+
 
 def execute(
     file: Annotated[
-        str, typer.Argument(show_default=False, help="Relative path to the file.")
-    ],
+        str,
+        typer.Argument(
+            show_default=False,
+            help="Relative path to the file ('-' or none for the standard input).",
+        ),
+    ] = STDIN,
     ignore_unnec: Annotated[
         bool,
         typer.Option(
@@ -20,6 +27,19 @@ def execute(
         bool, typer.Option("--ignore-ws", help="Ignore all whitespace.")
     ] = False,
     full_msg: Annotated[bool, typer.Option(help="Show full message.")] = True,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", help="Quantity of processes used to count."),
+    ] = 1,
+    cache: Annotated[
+        bool, typer.Option(help="Reuse the count if the file didn't change.")
+    ] = True,
+    watch: Annotated[
+        bool,
+        typer.Option(
+            "--watch", "-w", help="Keep counting, printing the count on every change."
+        ),
+    ] = False,
 ):
     """
     COUNT CHARACTERS
@@ -27,39 +47,38 @@ def execute(
     Count the amount of characters in a text file.
     """
 
+    if jobs < 1:
+        raise typer.BadParameter("Quantity of processes must be positive.")
+
     current_dir = os.getcwd()
     file_abs_path = os.path.join(current_dir, file)
 
     try:
-        with open(file_abs_path, "r", encoding="utf-8") as f:
-            char_count = 0
-            first_char = ""
-            prev_char = ""
-            while True:
-                char = f.read(1)
-                if not char:
-                    break
-
-                if ignore_ws and char.isspace():
-                    pass
-                elif ignore_unnec and char.isspace() and prev_char.isspace():
-                    pass
-                else:
-                    char_count += 1
-
-                if prev_char == "":
-                    first_char = char
-                prev_char = char
-
-            last_char = prev_char
-            if ignore_unnec:
-                if first_char.isspace():
-                    char_count -= 1
-                if last_char.isspace():
-                    char_count -= 1
-
-            print(f"Character count: {char_count}" if full_msg else char_count)
+        if watch:
+            _watch(file, ignore_unnec, ignore_ws, full_msg)
+            return
+        (summary,) = scan_files([file], jobs, cache)
+        char_count = summary.char_count(ignore_unnec, ignore_ws)
+        print(f"Character count: {char_count}" if full_msg else char_count)
     except FileNotFoundError as e:
         raise typer.BadParameter(f"'{file_abs_path}' does not exist.") from e
     except IsADirectoryError as e:
         raise typer.BadParameter(f"'{file_abs_path}' is not a file.") from e
+    except ScanError as e:
+        raise typer.BadParameter(str(e)) from e
+
+
+def _watch(file: str, ignore_unnec: bool, ignore_ws: bool, full_msg: bool) -> None:
+    if file == STDIN:
+        raise typer.BadParameter("The standard input can't be watched.")
+    with open(os.path.join(os.getcwd(), file), "rb"):
+        pass  # fails the same way as counting once if the file can't be read
+
+    try:
+        for (summary,) in watch_summaries([file]):
+            char_count = summary.char_count(ignore_unnec, ignore_ws)
+            print(
+                f"Character count: {char_count}" if full_msg else char_count, flush=True
+            )
+    except KeyboardInterrupt:
+        pass
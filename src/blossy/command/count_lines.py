@@ -1,37 +1,101 @@
 """'countl' command of the Blossy CLI."""
 
 import os
+from collections import defaultdict
 
 import typer
 from typing_extensions import Annotated
 
+from ..scan import STDIN, ScanError, collect_files, scan_files
+from ..watch import watch_summaries
+
 
 def execute(
-    file: Annotated[
-        str, typer.Argument(show_default=False, help="Relative path to the file.")
-    ],
+    paths: Annotated[
+        list[str] | None,
+        typer.Argument(
+            show_default=False,
+            help="Relative paths to files or directories, or glob patterns "
+            + "('-' or none for the standard input).",
+        ),
+    ] = None,
     ignore_blank: Annotated[bool, typer.Option(help="Ignore all blank lines.")] = True,
     full_msg: Annotated[bool, typer.Option(help="Show full message.")] = True,
+    jobs: Annotated[
+        int | None,
+        typer.Option(
+            "--jobs",
+            "-j",
+            show_default=False,
+            help="Quantity of processes used to count (default: one per CPU).",
+        ),
+    ] = None,
+    cache: Annotated[
+        bool, typer.Option(help="Reuse the counts of files that didn't change.")
+    ] = True,
+    watch: Annotated[
+        bool,
+        typer.Option(
+            "--watch", "-w", help="Keep counting, printing the count on every change."
+        ),
+    ] = False,
 ):
     """
     COUNT LINES
 
-    Count the amount of lines in a code source file.
+    Count the amount of lines in code source files. Directories are walked
+    recursively, skipping hidden entries, and several files are counted in
+    parallel, reporting each file and the totals by extension.
     """
+    if jobs is not None and jobs < 1:
+        raise typer.BadParameter("Quantity of processes must be positive.")
 
-    current_dir = os.getcwd()
-    file_abs_path = os.path.join(current_dir, file)
-
+    paths = paths or [STDIN]
     try:
-        with open(file_abs_path, "r", encoding="utf-8") as f:
-            line_count = 0
-            for line in f:
-                if ignore_blank and (line.isspace() or len(line) == 0):
-                    continue
-                line_count += 1
-
-            print(f"Line count: {line_count}" if full_msg else line_count)
+        files = collect_files(paths)
+        if watch:
+            _watch(files, ignore_blank, full_msg)
+            return
+        summaries = scan_files(files, jobs, cache)
     except FileNotFoundError as e:
-        raise typer.BadParameter(f"'{file_abs_path}' does not exist.") from e
+        raise typer.BadParameter(f"'{e.filename}' does not exist.") from e
     except IsADirectoryError as e:
-        raise typer.BadParameter(f"'{file_abs_path}' is not a file.") from e
+        raise typer.BadParameter(f"'{e.filename}' is not a file.") from e
+    except ScanError as e:
+        raise typer.BadParameter(str(e)) from e
+
+    line_counts = [summary.line_count(ignore_blank) for summary in summaries]
+    total = sum(line_counts)
+    if full_msg and (len(paths) > 1 or files != paths):
+        _print_report(files, line_counts)
+    print(f"Line count: {total}" if full_msg else total)
+
+
+def _watch(files: list[str], ignore_blank: bool, full_msg: bool) -> None:
+    if STDIN in files:
+        raise typer.BadParameter("The standard input can't be watched.")
+
+    try:
+        for summaries in watch_summaries(files):
+            total = sum(summary.line_count(ignore_blank) for summary in summaries)
+            print(f"Line count: {total}" if full_msg else total, flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+def _print_report(files: list[str], line_counts: list[int]) -> None:
+    width = len(str(sum(line_counts)))
+    by_ext = defaultdict(lambda: [0, 0])
+    for file, line_count in zip(files, line_counts):
+        print(f"{line_count:>{width}}  {file}")
+        ext_total = by_ext[os.path.splitext(file)[1] or "(no extension)"]
+        ext_total[0] += 1
+        ext_total[1] += line_count
+
+    print()
+    for ext, (qt_files, line_count) in sorted(
+        by_ext.items(), key=lambda item: item[1][1], reverse=True
+    ):
+        plural = "s" if qt_files > 1 else ""
+        print(f"{line_count:>{width}}  {ext} ({qt_files} file{plural})")
+    print()
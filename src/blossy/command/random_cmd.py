@@ -1,10 +1,12 @@
 """'rand' command of the Blossy CLI."""
 
-import random
+import sys
 
 import typer
 from typing_extensions import Annotated
 
+from ..rand import FORMATS, Uniform, write_numbers
+
 
 def execute(
     lower: Annotated[
@@ -21,6 +23,46 @@ def execute(
             "--quantity", "-q", help="Quantity of random numbers to generate."
         ),
     ] = 1,
+    output_format: Annotated[
+        str,
+        typer.Option(
+            "--format",
+            "-f",
+            help="How the numbers are written: "
+            + ", ".join(FORMATS)
+            + " (u32, u64 and raw are unsigned little-endian binary, "
+            + "raw with the fewest bytes that hold the upper limit).",
+        ),
+    ] = "text",
+    seed: Annotated[
+        int | None,
+        typer.Option(
+            show_default=False,
+            help="Seed that makes the numbers reproducible "
+            + "(they're the same for any quantity of processes).",
+        ),
+    ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            help="Quantity of processes used to generate (unique numbers "
+            + "are generated by one).",
+        ),
+    ] = 1,
+    unique: Annotated[
+        bool,
+        typer.Option("--unique", "-u", help="Generate different numbers."),
+    ] = False,
+    sort: Annotated[
+        bool,
+        typer.Option(
+            "--sorted",
+            help="Write the unique numbers in increasing order, "
+            + "as they're generated.",
+        ),
+    ] = False,
 ):
     """
     RANDOM
@@ -29,8 +71,35 @@ def execute(
     """
     if lower > upper:
         raise typer.BadParameter("Invalid range.")
+    if unique and quantity > upper - lower + 1:
+        raise typer.BadParameter("Quantity greater than the size of the range.")
+    if sort and not unique:
+        raise typer.BadParameter("Only unique numbers can be sorted.")
+    if quantity < 0:
+        raise typer.BadParameter("Quantity must not be negative.")
+    if jobs < 1:
+        raise typer.BadParameter("Quantity of processes must be positive.")
+    if output_format not in FORMATS:
+        raise typer.BadParameter(f"Format must be one of: {', '.join(FORMATS)}.")
+    if output_format in ("u32", "u64", "raw"):
+        bits = {"u32": 32, "u64": 64}.get(output_format)
+        if lower < 0:
+            raise typer.BadParameter("Binary formats can't have negative numbers.")
+        if bits is not None and upper >= 1 << bits:
+            raise typer.BadParameter(
+                f"Numbers over 2^{bits} - 1 can't be written as {output_format}."
+            )
 
-    for i in range(quantity):
-        number = random.randint(lower, upper)
-        end_char = " " if i < (quantity - 1) else "\n"
-        print(number, end=end_char)
+    # the numbers are written in blocks, straight to the buffer of the output
+    sys.stdout.flush()
+    write_numbers(
+        Uniform(lower, upper),
+        quantity,
+        sys.stdout.buffer,
+        output_format,
+        seed,
+        jobs,
+        unique,
+        sort,
+    )
+    sys.stdout.buffer.flush()
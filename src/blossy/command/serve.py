@@ -0,0 +1,46 @@
+"""'serve' command of the Blossy CLI."""
+
+import typer
+from typing_extensions import Annotated
+
+from ..client import UntrustedSocketError, make_socket_dir, socket_path
+from ..daemon import IDLE_TIMEOUT, serve
+
+
+def execute(
+    idle_timeout: Annotated[
+        float,
+        typer.Option(help="Seconds without commands after which the daemon stops."),
+    ] = IDLE_TIMEOUT,
+    spare: Annotated[
+        int,
+        typer.Option(
+            help="Quantity of idle processes kept ready to run commands "
+            + "(more are started when they're all busy)."
+        ),
+    ] = 2,
+):
+    """
+    SERVE
+
+    Keep Blossy loaded in a daemon that runs the commands given to
+    'blossy-client', which takes the same arguments as 'blossy' but skips
+    loading Blossy on every call.
+    """
+    if idle_timeout <= 0:
+        raise typer.BadParameter("Idle timeout must be positive.")
+    if spare < 1:
+        raise typer.BadParameter("Quantity of processes must be positive.")
+
+    path = socket_path()
+    try:
+        make_socket_dir(path)
+    except (OSError, UntrustedSocketError) as e:
+        raise typer.BadParameter(f"Can't keep the socket there: {e}.") from e
+    print(f"Listening on {path}", flush=True)
+    try:
+        serve(path, idle_timeout, spare)
+    except FileExistsError as e:
+        raise typer.BadParameter(f"'{path}' is already in use.") from e
+    except KeyboardInterrupt:
+        pass
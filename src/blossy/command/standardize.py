@@ -3,19 +3,32 @@
 import os
 import random
 import string
-from collections.abc import Iterable
 
 import typer
 from typing_extensions import Annotated
 
+from ..journal import (
+    JournalError,
+    apply_journal,
+    read_journal,
+    remove_journal,
+    resume_journal,
+    write_journal,
+)
+
 
 def execute(
     prefix: Annotated[
-        str, typer.Argument(show_default=False, help="Prefix of the files.")
-    ],
+        str | None,
+        typer.Argument(
+            show_default=False,
+            help="Prefix of the files (not given with --undo or --abandon).",
+        ),
+    ] = None,
     directory: Annotated[
-        str, typer.Argument(show_default=False, help="Relative path to the directory.")
-    ],
+        str | None,
+        typer.Argument(show_default=False, help="Relative path to the directory."),
+    ] = None,
     start_idx: Annotated[
         int, typer.Option("--start", "-s", help="Starting number for the IDs.")
     ] = 0,
@@ -25,20 +38,59 @@ def execute(
             "--digits", "-d", help="Quantity of digits used to represent the ID."
         ),
     ] = 3,
+    undo: Annotated[
+        bool,
+        typer.Option("--undo", help="Give the files back the names of the last run."),
+    ] = False,
+    abandon: Annotated[
+        bool,
+        typer.Option(
+            "--abandon",
+            help="Forget the renames of an interrupted run instead of finishing "
+            + "them (the files keep the names they have).",
+        ),
+    ] = False,
 ) -> None:
     """
     STARDARDIZE
 
     Rename all files in a DIRECTORY to '{PREFIX}-{ID}', in which the ID is
-    calculated incrementally.
+    calculated incrementally. If the last run in the directory was
+    interrupted, its renames are finished first.
     """
+    if undo and abandon:
+        raise typer.BadParameter("Give either --undo or --abandon.")
+    if (undo or abandon) and directory is None:
+        prefix, directory = None, prefix
+    if directory is None:
+        raise typer.BadParameter(
+            "Give the directory."
+            if undo or abandon
+            else "Give the prefix and the directory."
+        )
     if start_idx < 0:
         raise typer.BadParameter("Negative starting number.")
 
     dir_abs_path = os.path.abspath(directory)
 
+    if abandon:
+        if not remove_journal(os.path.realpath(dir_abs_path)):
+            raise typer.BadParameter("Nothing to abandon.")
+        return
+
     try:
-        files = _get_files(dir_abs_path)
+        journal = read_journal(os.path.realpath(dir_abs_path))
+        if journal is not None and not journal.complete:
+            print("Finishing the renames of the last run.")
+            resume_journal(journal)
+        if undo:
+            if journal is None:
+                raise typer.BadParameter("Nothing to undo.")
+            renames = [(new, old) for old, new in reversed(journal.renames)]
+            apply_journal(write_journal(journal.directory, renames))
+            return
+
+        files, others = _get_files(dir_abs_path)
 
         last_id = start_idx + len(files) - 1
         min_qt_digits = len(str(last_id))
@@ -48,12 +100,17 @@ def execute(
         else:
             qt_reajusted = False
 
-        # to prevent overriding previous files
-        temp_prefix = "".join(random.choices(string.ascii_letters, k=10))
-        _rename(dir_abs_path, files, temp_prefix, qt_digits, start_idx)
-
-        files = _get_files(dir_abs_path)
-        _rename(dir_abs_path, files, prefix, qt_digits, start_idx)
+        targets = _assign_names(files, prefix, qt_digits, start_idx)
+        for target in targets.values():
+            if target in others:
+                raise typer.BadParameter(
+                    f"'{os.path.join(dir_abs_path, target)}' is in the way."
+                )
+        renames = _plan_renames(targets, others)
+        if renames:
+            # the journal is only replaced when there's something to rename,
+            # so --undo still undoes the last run that renamed files
+            apply_journal(write_journal(os.path.realpath(dir_abs_path), renames))
 
         if qt_reajusted:
             print("Quantity of digits had to be reajusted.")
@@ -61,27 +118,104 @@ def execute(
         raise typer.BadParameter(f"'{dir_abs_path}' does not exist.") from e
     except NotADirectoryError as e:
         raise typer.BadParameter(f"'{dir_abs_path}' is not a directory.") from e
+    except JournalError as e:
+        raise typer.BadParameter(
+            f"{e} Fix it and run again, or forget the renames left with --abandon."
+        ) from e
 
 
-def _get_files(directory_path: str) -> tuple[str]:
+def _get_files(directory_path: str) -> tuple[list[str], set[str]]:
+    # names of the files, and of the other entries, from a single listing
+    # (the type of most entries comes with it, without a 'stat' for each)
     files = []
-    for item in os.listdir(directory_path):
-        file_abs_path = os.path.join(directory_path, item)
-        if os.path.isfile(file_abs_path):
-            files.append(item)
-    return tuple(files)
-
-
-def _rename(
-    dir_path: str, files: Iterable[str], prefix: str, qt_digits: int, start_idx: int
-) -> None:
-    idx = start_idx
+    others = set()
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                files.append(entry.name)
+            else:
+                others.add(entry.name)
+    files.sort()
+    return files, others
+
+
+def _assign_names(
+    files: list[str], prefix: str, qt_digits: int, start_idx: int
+) -> dict[str, str]:
+    # files already named with one of the IDs keep it, and the others get the
+    # free ones, in the order of their names, so no file takes the name of one
+    # that moves (the planner still orders the renames for when one does)
+    ids = {}
+    taken = set()
+    last_id = start_idx + len(files) - 1
+    for filename in files:
+        stem, _ = os.path.splitext(filename)
+        num_str = stem.removeprefix(f"{prefix}-")
+        if (
+            stem != num_str
+            and len(num_str) == qt_digits
+            and num_str.isascii()
+            and num_str.isdigit()
+            and start_idx <= int(num_str) <= last_id
+            and int(num_str) not in taken
+        ):
+            ids[filename] = int(num_str)
+            taken.add(int(num_str))
+
+    free_ids = (idx for idx in range(start_idx, last_id + 1) if idx not in taken)
+    targets = {}
     for filename in files:
+        idx = ids[filename] if filename in ids else next(free_ids)
         _, ext = os.path.splitext(filename)
-        new_file = _build_file_name(prefix, idx, qt_digits) + ext
-        os.rename(os.path.join(dir_path, filename), os.path.join(dir_path, new_file))
+        targets[filename] = _build_file_name(prefix, idx, qt_digits) + ext
+    return targets
 
-        idx += 1
+
+def _plan_renames(targets: dict[str, str], others: set[str]) -> list[tuple[str, str]]:
+    """
+    Renames that give each file its target name, in an order in which no
+    file is overwritten. Files already named correctly aren't renamed, and
+    each cycle of files taking the names of each other goes through one
+    temporary name, named after none of the entries in the directory.
+    """
+    moves = {old: new for old, new in targets.items() if old != new}
+    # file moving to the name of each file, which can only move after it
+    waiting = {new: old for old, new in moves.items() if new in moves}
+    plan = []
+
+    def move_chain(old_name: str, new_name: str) -> None:
+        # renames 'old_name' and then the files waiting for it, one by one
+        while old_name is not None:
+            plan.append((old_name, new_name))
+            del moves[old_name]
+            old_name = waiting.pop(old_name, None)
+            new_name = moves.get(old_name)
+
+    for old_name in list(moves):
+        if old_name in moves and moves[old_name] not in moves:
+            move_chain(old_name, moves[old_name])
+
+    names = set(targets) | others
+    while moves:
+        # only cycles are left
+        old_name, new_name = next(iter(moves.items()))
+        temp_name = _temp_name(names)
+        plan.append((old_name, temp_name))
+        del moves[old_name]
+        # the file is out of the way, and its target waits for it no longer
+        del waiting[new_name]
+        waiting_name = waiting.pop(old_name)
+        move_chain(waiting_name, moves[waiting_name])
+        plan.append((temp_name, new_name))
+    return plan
+
+
+def _temp_name(names: set[str]) -> str:
+    while True:
+        name = "." + "".join(random.choices(string.ascii_letters, k=10))
+        if name not in names:
+            names.add(name)
+            return name
 
 
 def _build_file_name(prefix: str, index: int, qt_digits: int) -> str:
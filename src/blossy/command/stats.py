@@ -0,0 +1,82 @@
+"""'stats' command of the Blossy CLI."""
+
+import typer
+from typing_extensions import Annotated
+
+from ..scan import STDIN, ScanError, TextSummary, collect_files, scan_files
+
+_LABELS = (
+    "Lines",
+    "Non-blank lines",
+    "Characters",
+    "Non-whitespace characters",
+    "Characters without unnecessary whitespace",
+)
+
+
+def execute(
+    paths: Annotated[
+        list[str] | None,
+        typer.Argument(
+            show_default=False,
+            help="Relative paths to files or directories, or glob patterns "
+            + "('-' or none for the standard input).",
+        ),
+    ] = None,
+    full_msg: Annotated[bool, typer.Option(help="Show full message.")] = True,
+    jobs: Annotated[
+        int | None,
+        typer.Option(
+            "--jobs",
+            "-j",
+            show_default=False,
+            help="Quantity of processes used to count (default: one per CPU).",
+        ),
+    ] = None,
+    cache: Annotated[
+        bool, typer.Option(help="Reuse the counts of files that didn't change.")
+    ] = True,
+):
+    """
+    STATISTICS
+
+    Count the lines and characters of text files at once, reading each file
+    only one time. The counts match the ones from 'countl' and 'countc'.
+    """
+    if jobs is not None and jobs < 1:
+        raise typer.BadParameter("Quantity of processes must be positive.")
+
+    paths = paths or [STDIN]
+    try:
+        files = collect_files(paths)
+        summaries = scan_files(files, jobs, cache)
+    except FileNotFoundError as e:
+        raise typer.BadParameter(f"'{e.filename}' does not exist.") from e
+    except IsADirectoryError as e:
+        raise typer.BadParameter(f"'{e.filename}' is not a file.") from e
+    except ScanError as e:
+        raise typer.BadParameter(str(e)) from e
+
+    rows = [_stats(summary) for summary in summaries]
+    totals = tuple(sum(column) for column in zip(*rows)) or (0,) * len(_LABELS)
+    if not full_msg:
+        print(*totals)
+        return
+
+    if len(paths) > 1 or files != paths:
+        width = len(str(max(totals)))
+        for file, row in zip(files, rows):
+            print("  ".join(f"{value:>{width}}" for value in row) + f"  {file}")
+        print()
+    for label, value in zip(_LABELS, totals):
+        print(f"{label}: {value}")
+
+
+def _stats(summary: TextSummary) -> tuple[int, ...]:
+    return (
+        summary.line_count(ignore_blank=False),
+        summary.line_count(ignore_blank=True),
+        summary.char_count(),
+        summary.char_count(ignore_ws=True),
+        summary.char_count(ignore_unnec=True),
+    )
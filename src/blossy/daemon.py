@@ -0,0 +1,228 @@
+"""Daemon that keeps Blossy loaded and runs the commands sent by 'blossy.client'."""
+
+import gc
+import importlib
+import os
+import random
+import select
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+import traceback
+
+import click
+import typer
+
+from .client import (
+    HEADER,
+    STATUS,
+    UntrustedSocketError,
+    check_peer,
+    decode_request,
+    recv_exactly,
+)
+from .main import app
+
+IDLE_TIMEOUT = 600.0
+
+# workers tell the daemon when they start (b"+") and finish (b"-") a command
+_REPORT = struct.Struct("!ci")
+_CHECK_SECS = 1.0
+
+
+def serve(path: str, idle_timeout: float = IDLE_TIMEOUT, spare: int = 2) -> None:
+    """
+    Run commands for the clients that connect to the socket at 'path' in
+    processes forked from this one, until no command was received or running
+    for 'idle_timeout' seconds. Each process runs one command at a time, and
+    'spare' idle ones are kept ready. Raises FileExistsError if another
+    daemon is listening on the socket.
+    """
+    command = _load_commands()
+    _remove_stale_socket(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(old_umask)
+    listener.listen(64)
+
+    reports, report_fd = os.pipe()
+    pids = set()
+    busy = set()
+    last_used = time.monotonic()
+    try:
+        while True:
+            while len(pids) - len(busy) < spare:
+                pids.add(_fork_worker(listener, command, report_fd))
+
+            if select.select([reports], [], [], _CHECK_SECS)[0]:
+                data = os.read(reports, _REPORT.size * 64)
+                for state, pid in _REPORT.iter_unpack(data):
+                    if state == b"+":
+                        busy.add(pid)
+                    else:
+                        busy.discard(pid)
+                last_used = time.monotonic()
+
+            while pids and (pid := os.waitpid(-1, os.WNOHANG)[0]):
+                pids.discard(pid)
+                busy.discard(pid)
+            if not busy and time.monotonic() - last_used >= idle_timeout:
+                return
+    finally:
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        listener.close()
+        os.unlink(path)
+
+
+def _load_commands() -> click.Command:
+    # everything is loaded before forking, so the workers share it
+    command = typer.main.get_command(app)
+    ctx = click.Context(command)
+    for name in command.list_commands(ctx):
+        command.get_command(ctx, name)
+    try:
+        # used to show help and errors
+        importlib.import_module("typer.rich_utils")
+    except ImportError:
+        pass
+    # keeps the workers from copying the memory of every object
+    gc.freeze()
+    return command
+
+
+def _fork_worker(
+    listener: socket.socket, command: click.Command, report_fd: int
+) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+
+    status = 1
+    try:
+        # otherwise every worker would generate the same numbers
+        random.seed()
+        # the daemon may have been started with SIGINT ignored, like in the background
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        while True:
+            conn, _ = listener.accept()
+            os.write(report_fd, _REPORT.pack(b"+", os.getpid()))
+            with conn:
+                _handle(conn, command)
+            os.write(report_fd, _REPORT.pack(b"-", os.getpid()))
+    except KeyboardInterrupt:
+        status = 0
+    finally:
+        os._exit(status)
+
+
+def _handle(conn: socket.socket, command: click.Command) -> None:
+    try:
+        check_peer(conn)
+    except UntrustedSocketError:
+        return
+    header, fds, _, _ = socket.recv_fds(conn, HEADER.size, 3)
+    try:
+        if len(header) < HEADER.size:
+            header += recv_exactly(conn, HEADER.size - len(header))
+        (size,) = HEADER.unpack(header)
+        argv, cwd, env = decode_request(recv_exactly(conn, size))
+    except (ConnectionError, ValueError):
+        argv = None
+    if argv is None or len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        return
+
+    conn.sendall(STATUS.pack(os.getpid()))
+    done = threading.Event()
+    watcher = threading.Thread(target=_interrupt_when_gone, args=(conn, done))
+    watcher.start()
+    try:
+        code = _run(command, argv, cwd, env, fds)
+        done.set()
+        conn.sendall(STATUS.pack(code))
+    finally:
+        done.set()
+        conn.shutdown(socket.SHUT_RDWR)
+        watcher.join()
+
+
+def _interrupt_when_gone(conn: socket.socket, done: threading.Event) -> None:
+    # clients send nothing after the request, so this waits until they're gone
+    try:
+        conn.recv(1)
+    except OSError:
+        pass
+    if not done.is_set():
+        os.kill(os.getpid(), signal.SIGINT)
+
+
+def _run(
+    command: click.Command,
+    argv: list[str],
+    cwd: str,
+    env: dict[str, str],
+    fds: list[int],
+) -> int:
+    # the command works on the client's streams, directory and environment,
+    # and the worker's own are put back afterwards, along with the digits that
+    # ints may be converted to (which 'calc --max-digits' raises)
+    saved_fds = [os.dup(fd) for fd in range(3)]
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_max_str_digits = sys.get_int_max_str_digits()
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = open(0, closefd=False)
+    sys.stdout = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+    sys.stderr = open(2, "w", buffering=1, closefd=False)
+    os.environ.clear()
+    os.environ.update(env)
+
+    try:
+        os.chdir(cwd)
+        command.main(args=argv, prog_name="blossy")
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    finally:
+        for stream in (sys.stdin, sys.stdout, sys.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        for target, fd in enumerate(saved_fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+        sys.set_int_max_str_digits(saved_max_str_digits)
+    return code
+
+
+def _remove_stale_socket(path: str) -> None:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except FileNotFoundError:
+            return
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise FileExistsError(path)
@@ -0,0 +1,22 @@
+"""
+Durations written as text, read the same way by the tables of 'calc' and by
+'blossy.columns', without importing either.
+"""
+
+import re
+
+# like the time constants of expressions, with a sign and spaces around them
+DURATION = re.compile(r" *(-?)(?:([0-9]+):)?([0-9]+):([0-9]+) *")
+
+
+def parse_seconds(text: str) -> int:
+    """
+    Seconds of a duration written as [-][H:]MM:SS, with optional spaces
+    around it. Raises ValueError if 'text' isn't a duration.
+    """
+    match = DURATION.fullmatch(text)
+    if match is None:
+        raise ValueError(f"invalid duration: {text!r}")
+    sign, hours, minutes, seconds = match.groups()
+    absolute = (int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)
+    return 0 - absolute if sign else absolute
@@ -0,0 +1,175 @@
+"""
+Write-ahead journal of the renames of a directory, kept under the user's
+state directory, so an interrupted run can be resumed and a finished one
+undone.
+
+The renames are written and synced before the first one is done, and the
+quantity of renames done is committed every SYNC_EVERY renames, after the
+directory itself is synced, so a committed rename is never lost. Along with
+each rename goes the inode of the file it moves, which tells the renames
+done after the last commit apart from the ones that weren't, as a file never
+goes back to a name it left, even in the plans with cycles.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+
+SYNC_EVERY = 1024
+
+
+class JournalError(Exception):
+    """Raised when the directory doesn't match what its journal says."""
+
+
+def state_dir() -> str:
+    """Directory where Blossy keeps the journals of 'stddz'."""
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".local", "state"
+    )
+    return os.path.join(base, "blossy", "stddz")
+
+
+@dataclass
+class Journal:
+    """
+    Renames of a directory, as (old name, new name), the inodes of the files
+    they move (None if missing) and how many of them are done.
+    """
+
+    directory: str
+    renames: list[tuple[str, str]]
+    inodes: list[int | None]
+    done: int = 0
+
+    @property
+    def complete(self) -> bool:
+        """Whether all of the renames are done."""
+        return self.done == len(self.renames)
+
+
+def read_journal(directory: str) -> Journal | None:
+    """Journal of the last run in the directory, or None if there's none."""
+    try:
+        with open(_journal_path(directory), encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("directory") != directory:
+                return None
+            renames = []
+            inodes = []
+            for _ in range(header["renames"]):
+                old_name, new_name, inode = json.loads(f.readline())
+                renames.append((old_name, new_name))
+                inodes.append(inode)
+            done = 0
+            for line in f:
+                try:
+                    done = json.loads(line)["done"]
+                except ValueError:
+                    # the last commit may have been cut short
+                    break
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return Journal(directory, renames, inodes, done)
+
+
+def write_journal(directory: str, renames: list[tuple[str, str]]) -> Journal:
+    """
+    Write the journal of the renames, replacing the one of the last run, and
+    sync it before returning it, so they can be applied.
+    """
+    inodes = _follow_inodes(directory, renames)
+    path = _journal_path(directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"directory": directory, "renames": len(renames)}) + "\n")
+        f.writelines(
+            json.dumps([old_name, new_name, inode]) + "\n"
+            for (old_name, new_name), inode in zip(renames, inodes)
+        )
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    _sync_dir(os.path.dirname(path))
+    return Journal(directory, renames, inodes)
+
+
+def remove_journal(directory: str) -> bool:
+    """Remove the journal of the directory, returning whether there was one."""
+    try:
+        os.remove(_journal_path(directory))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def apply_journal(journal: Journal) -> None:
+    """
+    Do the renames of the journal that aren't done, committing them as they
+    go. Raises JournalError if a file to rename is missing, or if a file has
+    the name another is renamed to, which is never replaced.
+    """
+    with open(_journal_path(journal.directory), "a", encoding="utf-8") as f:
+        while not journal.complete:
+            end = min(journal.done + SYNC_EVERY, len(journal.renames))
+            for old_name, new_name in journal.renames[journal.done : end]:
+                old_path = os.path.join(journal.directory, old_name)
+                new_path = os.path.join(journal.directory, new_name)
+                if os.path.lexists(new_path):
+                    raise JournalError(f"'{new_path}' is in the way.")
+                try:
+                    os.rename(old_path, new_path)
+                except FileNotFoundError as e:
+                    raise JournalError(f"'{old_path}' is missing.") from e
+            _sync_dir(journal.directory)
+            f.write(json.dumps({"done": end}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            journal.done = end
+
+
+def resume_journal(journal: Journal) -> None:
+    """
+    Finish the renames of a journal whose run was interrupted. The renames
+    done after the last commit are the ones up to the first whose file is
+    still under its old name.
+    """
+    while not journal.complete:
+        old_name, _ = journal.renames[journal.done]
+        inode = journal.inodes[journal.done]
+        try:
+            info = os.lstat(os.path.join(journal.directory, old_name))
+        except FileNotFoundError:
+            info = None
+        if inode is None or (info is not None and info.st_ino == inode):
+            break
+        journal.done += 1
+    apply_journal(journal)
+
+
+def _follow_inodes(directory: str, renames: list[tuple[str, str]]) -> list[int | None]:
+    # inode of the file moved by each rename, going through the renames
+    with os.scandir(directory) as entries:
+        inodes = {entry.name: entry.inode() for entry in entries}
+    moved = []
+    for old_name, new_name in renames:
+        inode = inodes.pop(old_name, None)
+        moved.append(inode)
+        if inode is not None:
+            inodes[new_name] = inode
+    return moved
+
+
+def _journal_path(directory: str) -> str:
+    name = hashlib.sha256(directory.encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(state_dir(), f"{name}.journal")
+
+
+def _sync_dir(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -1,23 +1,67 @@
 """Entry point for the Blossy CLI."""
 
+import importlib
+
+import click
 import typer
+from click.shell_completion import CompletionItem
+from typer.core import TyperGroup
+from typer.main import get_command_from_info
+from typer.models import CommandInfo
+
+# command name -> (module in 'blossy.command', short help)
+COMMANDS = {
+    "calc": ("calculate", "CALCULATE"),
+    "countc": ("count_chars", "COUNT CHARACTERS"),
+    "countl": ("count_lines", "COUNT LINES"),
+    "perc": ("percentage", "PERCENTAGE"),
+    "rand": ("random_cmd", "RANDOM"),
+    "serve": ("serve", "SERVE"),
+    "stddz": ("standardize", "STARDARDIZE"),
+    "stats": ("stats", "STATISTICS"),
+}
+
+
+class LazyGroup(TyperGroup):
+    """
+    Group of the commands in COMMANDS, which imports the module of a command
+    only when the command is used, so starting up doesn't pay for all of them.
+    """
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return list(COMMANDS)
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in self.commands and cmd_name in COMMANDS:
+            module_name, _ = COMMANDS[cmd_name]
+            module = importlib.import_module(f".command.{module_name}", __package__)
+            self.commands[cmd_name] = get_command_from_info(
+                CommandInfo(name=cmd_name, callback=module.execute),
+                pretty_exceptions_short=app.pretty_exceptions_short,
+                rich_markup_mode=app.rich_markup_mode,
+            )
+        return self.commands.get(cmd_name)
+
+    def shell_complete(
+        self, ctx: click.Context, incomplete: str
+    ) -> list[CompletionItem]:
+        # the short help comes from COMMANDS, so completing imports nothing
+        results = [
+            CompletionItem(name, help=short_help)
+            for name, (_, short_help) in COMMANDS.items()
+            if name.startswith(incomplete)
+        ]
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
 
-from .command import (
-    calculate,
-    count_chars,
-    count_lines,
-    percentage,
-    random_cmd,
-    standardize,
-)
 
 app = typer.Typer(
-    name="blossy", help="A lil' bud that helps you with stuff (it's a utility CLI)."
+    name="blossy",
+    cls=LazyGroup,
+    help="A lil' bud that helps you with stuff (it's a utility CLI).",
 )
 
-app.command("calc")(calculate.execute)
-app.command("countc")(count_chars.execute)
-app.command("countl")(count_lines.execute)
-app.command("perc")(percentage.execute)
-app.command("rand")(random_cmd.execute)
-app.command("stddz")(standardize.execute)
+
+@app.callback()
+def main() -> None:
+    """A lil' bud that helps you with stuff (it's a utility CLI)."""
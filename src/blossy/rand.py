@@ -0,0 +1,396 @@
+"""
+Random integers generated a block at a time, and written as text or binary.
+
+The numbers of a block come from one call to 'random.Random.randbytes',
+which is cut into words, masked to the bits of the range and filtered by
+rejection sampling. NumPy does the filtering of large blocks when it's
+installed, and the numbers are the same either way, as the bits always come
+from 'random'.
+
+Each block has its own generator, seeded with a hash of the seed of the
+stream and the index of the block, so blocks can be generated in any order
+and by any process, and a seed gives the same numbers however they're split.
+"""
+
+import hashlib
+import itertools
+import math
+import random
+import secrets
+import sys
+from array import array
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import cache, partial
+from typing import Any, BinaryIO
+
+BLOCK_SIZE = 65536
+# smaller blocks are filtered without NumPy, which isn't worth loading for them
+NUMPY_MIN_SIZE = 4096
+FORMATS = ("text", "ndjson", "u32", "u64", "raw")
+
+# array type codes by width in bytes
+_WORDS = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+class Uniform:
+    """Uniform distribution of the integers between 'lower' and 'upper'."""
+
+    def __init__(self, lower: int, upper: int) -> None:
+        if lower > upper:
+            raise ValueError("lower limit greater than upper limit")
+        self.lower = lower
+        self.upper = upper
+        self.span = upper - lower + 1
+        self.bits = (self.span - 1).bit_length()
+        self.width = next((w for w in _WORDS if w * 8 >= self.bits), None)
+        # translation tables masking the bytes of each (little-endian) word,
+        # or None for the bytes that are kept whole
+        self._masks: list[bytes | None] = []
+        for byte in range(self.width or 0):
+            bits = min(max(self.bits - byte * 8, 0), 8)
+            mask = (1 << bits) - 1
+            self._masks.append(
+                None if bits == 8 else bytes(value & mask for value in range(256))
+            )
+
+    def block(self, rng: random.Random, size: int) -> Any:
+        """
+        'size' numbers of the distribution, taken from 'rng', as a list or
+        an array ('array' or NumPy).
+        """
+        if self.span == 1:
+            return [self.lower] * size
+        if self.width is None:
+            return [self.lower + rng.randrange(self.span) for _ in range(size)]
+
+        np = _numpy() if size >= NUMPY_MIN_SIZE else None
+        parts = []
+        missing = size
+        while missing > 0:
+            # enough words for the missing numbers, most of the time
+            words = missing * (1 << self.bits) // self.span + 16
+            parts.append(self._accept(self._words(rng, words), np))
+            missing -= len(parts[-1])
+        if _is_ndarray(parts[0]):
+            return np.concatenate(parts)[:size]
+        numbers = parts[0]
+        for part in parts[1:]:
+            numbers.extend(part)
+        del numbers[size:]
+        return numbers
+
+    def _words(self, rng: random.Random, quantity: int) -> bytearray:
+        data = bytearray(rng.randbytes(quantity * self.width))
+        for byte, mask in enumerate(self._masks):
+            if mask is not None:
+                data[byte :: self.width] = data[byte :: self.width].translate(mask)
+        return data
+
+    def _accept(self, data: bytearray, np: Any = None) -> Any:
+        # the words below 'span', plus 'lower' (with NumPy if 'np' is given
+        # and the numbers fit in its ints)
+        rejects = self.span != 1 << self.bits
+        if np is not None and self.upper < 1 << 64:
+            words = np.frombuffer(data, dtype=f"<u{self.width}")
+            if rejects:
+                words = words[words < self.span]
+            if -(1 << 63) <= self.lower and self.upper < 1 << 63:
+                return words.astype(np.int64) + self.lower
+            if 0 <= self.lower:
+                return words.astype(np.uint64) + np.uint64(self.lower)
+            return [self.lower + word for word in words.tolist()]
+
+        if self.width == 1 and 0 <= self.lower and self.upper < 256:
+            # bytes are filtered and shifted by translating them, without a loop
+            if rejects:
+                data = data.translate(None, bytes(range(self.span, 256)))
+            if self.lower:
+                data = data.translate(
+                    bytes(range(self.lower, self.upper + 1)).ljust(256)
+                )
+            return array("B", data)
+        words = array(_WORDS[self.width], data)
+        if sys.byteorder == "big":
+            words.byteswap()
+        if rejects:
+            return [self.lower + word for word in words if word < self.span]
+        if self.lower:
+            return [self.lower + word for word in words]
+        return words
+
+
+def substream(seed: int, index: int) -> random.Random:
+    """Generator of the block 'index' of the stream of 'seed'."""
+    key = hashlib.blake2b(str(seed).encode(), digest_size=32).digest()
+    digest = hashlib.blake2b(
+        index.to_bytes(8, "little"), key=key, person=b"blossy.rand"
+    ).digest()
+    return random.Random(int.from_bytes(digest, "little"))
+
+
+def new_seed() -> int:
+    """Seed for a stream that isn't meant to be reproduced."""
+    return secrets.randbits(128)
+
+
+def generate(
+    distribution: Uniform, quantity: int, seed: int | None = None
+) -> Iterator[Any]:
+    """'quantity' numbers of the distribution, in blocks of BLOCK_SIZE."""
+    seed = new_seed() if seed is None else seed
+    for index in range(-(-quantity // BLOCK_SIZE)):
+        yield _block(distribution, quantity, seed, index)
+
+
+def sample(distribution: Uniform, quantity: int, seed: int | None = None) -> list[int]:
+    """
+    'quantity' different numbers of the distribution, in random order, in
+    time and memory proportional to 'quantity' however large the range is.
+    """
+    # Floyd's algorithm, which picks the numbers in an order of its own
+    rng = substream(new_seed() if seed is None else seed, 0)
+    span = distribution.span
+    picked: set[int] = set()
+    for last in range(span - quantity, span):
+        offset = rng.randrange(last + 1)
+        picked.add(last if offset in picked else offset)
+    numbers = [distribution.lower + offset for offset in picked]
+    rng.shuffle(numbers)
+    return numbers
+
+
+def sorted_sample(
+    distribution: Uniform, quantity: int, seed: int | None = None
+) -> Iterator[int]:
+    """
+    'quantity' different numbers of the distribution, in increasing order,
+    each one generated as it's taken, in time proportional to 'quantity'.
+    """
+    rng = substream(new_seed() if seed is None else seed, 0)
+    number = distribution.lower - 1
+    for skip in _skips(rng, quantity, distribution.span):
+        number += skip + 1
+        yield number
+
+
+def write_numbers(
+    distribution: Uniform,
+    quantity: int,
+    output: BinaryIO,
+    format: str,
+    seed: int | None = None,
+    jobs: int = 1,
+    unique: bool = False,
+    in_order: bool = False,
+) -> None:
+    """
+    Write 'quantity' numbers of the distribution to 'output': as text,
+    separated by spaces and ending with a newline, as NDJSON, one number per
+    line, or as unsigned little-endian binary, with 4 (u32), 8 (u64) or the
+    fewest bytes that hold the upper limit (raw) for each number. The blocks
+    are generated and formatted by 'jobs' processes, unless the numbers are
+    'unique' (see 'sample'), and 'in_order' (see 'sorted_sample').
+    """
+    seed = new_seed() if seed is None else seed
+    if unique:
+        if in_order:
+            numbers = sorted_sample(distribution, quantity, seed)
+        else:
+            numbers = iter(sample(distribution, quantity, seed))
+        encode = partial(_encode, format=format, upper=distribution.upper)
+        blocks = iter(lambda: list(itertools.islice(numbers, BLOCK_SIZE)), [])
+        _write_blocks(map(encode, blocks), output, format)
+        return
+
+    encode = partial(_encode_block, distribution, quantity, format, seed)
+    indices = range(-(-quantity // BLOCK_SIZE))
+    if jobs == 1 or len(indices) == 1:
+        _write_blocks(map(encode, indices), output, format)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        try:
+            blocks = _map_in_order(executor, encode, indices, jobs * 2)
+            _write_blocks(blocks, output, format)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+
+def _block(distribution: Uniform, quantity: int, seed: int, index: int) -> Any:
+    size = min(BLOCK_SIZE, quantity - index * BLOCK_SIZE)
+    return distribution.block(substream(seed, index), size)
+
+
+def _encode_block(
+    distribution: Uniform, quantity: int, format: str, seed: int, index: int
+) -> bytes:
+    numbers = _block(distribution, quantity, seed, index)
+    return _encode(numbers, format, distribution.upper)
+
+
+def _encode(numbers: Any, format: str, upper: int) -> bytes:
+    if format == "text":
+        return " ".join(map(str, _to_list(numbers))).encode()
+    if format == "ndjson":
+        return "\n".join(map(str, _to_list(numbers))).encode() + b"\n"
+    width = {"u32": 4, "u64": 8}.get(format)
+    return _to_bytes(numbers, width or max(1, (upper.bit_length() + 7) // 8))
+
+
+def _write_blocks(blocks: Iterable[bytes], output: BinaryIO, format: str) -> None:
+    written = False
+    for data in blocks:
+        if format == "text" and written:
+            output.write(b" ")
+        output.write(data)
+        written = True
+    if format == "text" and written:
+        output.write(b"\n")
+
+
+def _map_in_order(
+    executor: Executor, function: Callable[[Any], Any], items: Iterable[Any], ahead: int
+) -> Iterator[Any]:
+    # like 'executor.map', but without running more than 'ahead' items ahead
+    # of the ones taken, so the results don't pile up in memory
+    pending: deque = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _skips(rng: random.Random, quantity: int, total: int) -> Iterator[int]:
+    # Vitter's algorithm D ("An Efficient Algorithm for Sequential Random
+    # Sampling", 1987): how many of 'total' items are skipped before each of
+    # the 'quantity' ones taken, picked at random but with those taken in
+    # order, in time proportional to 'quantity'
+    n = quantity
+    remaining = total
+    if n == 0:
+        return
+    n_inv = 1 / n
+    v_prime = math.exp(math.log(1 - rng.random()) * n_inv)
+    qu1 = remaining - n + 1
+    threshold = -13 * n
+    while n > 1 and threshold < remaining:
+        n_min1_inv = 1 / (n - 1)
+        while True:
+            while True:
+                x = remaining * (1 - v_prime)
+                skip = _scale(rng, remaining, 1 - v_prime)
+                if skip < qu1:
+                    break
+                v_prime = math.exp(math.log(1 - rng.random()) * n_inv)
+            u = 1 - rng.random()
+            y1 = math.exp(math.log(u * remaining / qu1) * n_min1_inv)
+            v_prime = y1 * (1 - x / remaining) * (qu1 / (qu1 - skip))
+            if v_prime <= 1:
+                break
+            # the quick test failed, so the exact one is done
+            y2 = 1.0
+            top = remaining - 1
+            if n - 1 > skip:
+                bottom = remaining - n
+                limit = remaining - skip
+            else:
+                bottom = remaining - skip - 1
+                limit = qu1
+            for _ in range(remaining - limit):
+                y2 = (y2 * top) / bottom
+                top -= 1
+                bottom -= 1
+            if remaining / (remaining - x) >= y1 * math.exp(math.log(y2) * n_min1_inv):
+                v_prime = math.exp(math.log(1 - rng.random()) * n_min1_inv)
+                break
+            v_prime = math.exp(math.log(1 - rng.random()) * n_inv)
+        yield skip
+        remaining -= skip + 1
+        n -= 1
+        n_inv = n_min1_inv
+        qu1 -= skip
+        threshold += 13
+
+    if n > 1:
+        # most of what's left is taken, so it's quicker to go through it all
+        yield from _dense_skips(rng, n, remaining)
+    else:
+        yield _scale(rng, remaining, v_prime)
+
+
+def _dense_skips(rng: random.Random, quantity: int, total: int) -> Iterator[int]:
+    # Vitter's algorithm A, in time proportional to 'total'
+    n = quantity
+    top = total - n
+    remaining = total
+    while n >= 2:
+        v = rng.random()
+        skip = 0
+        quotient = top / remaining
+        while quotient > v:
+            skip += 1
+            top -= 1
+            remaining -= 1
+            quotient = (quotient * top) / remaining
+        yield skip
+        remaining -= 1
+        n -= 1
+    yield rng.randrange(remaining)
+
+
+def _scale(rng: random.Random, total: int, fraction: float) -> int:
+    # floor(total * fraction), with random bits below the precision of the
+    # float, so large totals get all of their values and not only a few
+    mantissa, exponent = math.frexp(fraction)
+    bits = total.bit_length()
+    numerator = (int(mantissa * (1 << 53)) << bits) | rng.getrandbits(bits)
+    return (total * numerator) >> (53 + bits - exponent)
+
+
+def _to_list(numbers: Any) -> list[int]:
+    return numbers if isinstance(numbers, list) else numbers.tolist()
+
+
+def _to_bytes(numbers: Any, width: int) -> bytes:
+    if width > 8:
+        return b"".join(
+            number.to_bytes(width, "little") for number in _to_list(numbers)
+        )
+    if width not in _WORDS:
+        # the bytes of wider words, without the high ones, which are 0
+        word_width = next(w for w in _WORDS if w > width)
+        words = _to_bytes(numbers, word_width)
+        data = bytearray(len(numbers) * width)
+        for byte in range(width):
+            data[byte::width] = words[byte::word_width]
+        return bytes(data)
+    if _is_ndarray(numbers):
+        return numbers.astype(f"<u{width}").tobytes()
+    if isinstance(numbers, array) and numbers.typecode == _WORDS[width]:
+        words = numbers
+    else:
+        words = array(_WORDS[width], numbers)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words.tobytes()
+
+
+@cache
+def _numpy() -> Any:
+    # NumPy, or None if it isn't installed, imported only when it's first
+    # needed, as it takes a while to load
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _is_ndarray(numbers: Any) -> bool:
+    # there are no NumPy arrays unless NumPy was loaded
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(numbers, numpy.ndarray)
@@ -0,0 +1,408 @@
+"""Single-pass scanning of UTF-8 text shared by the counting commands."""
+
+import bz2
+import errno
+import glob
+import gzip
+import io
+import lzma
+import mmap
+import os
+import stat
+import sys
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import BinaryIO
+
+from .cache import Cache, file_key
+
+CHUNK_SIZE = 1024 * 1024
+STDIN = "-"
+MAGIC_SIZE = 10
+
+ASCII_WS = b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f "
+# UTF-8 encodings of the non-ASCII characters for which str.isspace() is true
+UNICODE_WS = tuple(
+    char.encode()
+    for char in "\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006"
+    "\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+)
+
+# whitespace -> b" ", UTF-8 continuation byte -> b"c", anything else -> b"x"
+_CHAR_CLASSES = bytes(
+    0x20 if byte in ASCII_WS else 0x63 if 0x80 <= byte < 0xC0 else 0x78
+    for byte in range(256)
+)
+# line breaks -> b"\n", anything else -> b"x" (after deleting other whitespace)
+_LINE_CLASSES = bytes(0x0A if byte in b"\n\r" else 0x78 for byte in range(256))
+_INLINE_WS = bytes(byte for byte in ASCII_WS if byte not in b"\n\r")
+
+
+class ScanError(Exception):
+    """Raised when the data can't be scanned, like corrupt compressed data."""
+
+
+@dataclass
+class TextSummary:
+    """
+    Line and character counts of a piece of text, mergeable with the piece
+    after it. Newlines are universal ('\\r', '\\n' and '\\r\\n') and whitespace
+    is anything for which str.isspace() is true.
+    """
+
+    chars: int = 0
+    non_ws: int = 0
+    collapsed: int = 0
+    starts_ws: bool = False
+    ends_ws: bool = False
+    newlines: int = 0
+    non_blank: int = 0
+    head_content: bool = False
+    tail_content: bool = False
+    tail: bool = False
+
+    def __add__(self, other: "TextSummary") -> "TextSummary":
+        # a whitespace run or a line may continue from 'self' into 'other'
+        joined_run = self.ends_ws and other.starts_ws
+        joined_line = bool(other.newlines) and (
+            self.tail_content and not other.head_content
+        )
+        return TextSummary(
+            chars=self.chars + other.chars,
+            non_ws=self.non_ws + other.non_ws,
+            collapsed=self.collapsed + other.collapsed - joined_run,
+            starts_ws=self.starts_ws if self.chars else other.starts_ws,
+            ends_ws=other.ends_ws if other.chars else self.ends_ws,
+            newlines=self.newlines + other.newlines,
+            non_blank=self.non_blank + other.non_blank + joined_line,
+            head_content=self.head_content
+            or (not self.newlines and other.head_content),
+            tail_content=other.tail_content
+            or (not other.newlines and self.tail_content),
+            tail=other.tail or (not other.newlines and self.tail),
+        )
+
+    def char_count(self, ignore_unnec: bool = False, ignore_ws: bool = False) -> int:
+        """Character count according to the 'countc' flags."""
+        if ignore_ws:
+            count = self.non_ws
+        elif ignore_unnec:
+            count = self.collapsed
+        else:
+            count = self.chars
+
+        if ignore_unnec:
+            count -= self.starts_ws + self.ends_ws
+        return count
+
+    def line_count(self, ignore_blank: bool = True) -> int:
+        """Line count according to the 'countl' flags."""
+        if ignore_blank:
+            return self.non_blank + self.tail_content
+        return self.newlines + self.tail
+
+
+def scan_bytes(chunk: bytes) -> TextSummary:
+    """Summarize UTF-8 encoded text that is a whole number of characters."""
+    if not chunk:
+        return TextSummary()
+
+    if not chunk.isascii():
+        # the encoded whitespace becomes a single character, like when decoded
+        for ws in UNICODE_WS:
+            if ws in chunk:
+                chunk = chunk.replace(ws, b" ")
+
+    classes = chunk.translate(_CHAR_CLASSES)
+    crlf = chunk.count(b"\r\n")
+    code_points = len(chunk) - classes.count(b"c")
+    non_ws = code_points - classes.count(b" ")
+    starts_ws = classes[0] == 0x20
+    ws_runs = classes.count(b"x ") + classes.count(b"c ") + starts_ws
+    summary = TextSummary(
+        chars=code_points - crlf,
+        non_ws=non_ws,
+        collapsed=non_ws + ws_runs,
+        starts_ws=starts_ws,
+        ends_ws=classes[-1] == 0x20,
+    )
+
+    lines = chunk.translate(_LINE_CLASSES, _INLINE_WS)
+    first_break = lines.find(b"\n")
+    if first_break == -1:
+        summary.head_content = summary.tail_content = bool(lines)
+        summary.tail = True
+    else:
+        summary.newlines = lines.count(b"\n") - crlf
+        summary.non_blank = lines.count(b"x\n")
+        summary.head_content = first_break > 0
+        summary.tail_content = lines.rfind(b"\n") < len(lines) - 1
+        summary.tail = chunk[-1] not in b"\n\r"
+    return summary
+
+
+def scan_stream(source: BinaryIO | mmap.mmap, size: int | None = None) -> TextSummary:
+    """Summarize the text read from a binary stream, chunk by chunk."""
+    summary = TextSummary()
+    for chunk in iter_chunks(source, size):
+        summary += scan_bytes(chunk)
+    return summary
+
+
+def scan_file(path: str, jobs: int = 1) -> TextSummary:
+    """
+    Summarize a file, or the standard input if the path is '-'. Input
+    compressed with gzip, bzip2 or xz is decompressed while it's read. Other
+    regular files are memory-mapped and, if they're large enough, split in
+    ranges that are scanned by 'jobs' processes. Raises ScanError if the
+    compressed input is truncated or corrupt.
+    """
+    if path == STDIN:
+        return scan_decompressed(decompressed_stream(sys.stdin.buffer), path)
+
+    with open(os.path.join(os.getcwd(), path), "rb") as f:
+        info = os.fstat(f.fileno())
+        if not stat.S_ISREG(info.st_mode):
+            return scan_decompressed(decompressed_stream(f), path)
+        if info.st_size == 0:
+            return TextSummary()
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if (stream := decompressed(f, data[:MAGIC_SIZE])) is not f:
+                return scan_decompressed(stream, path)
+            if jobs == 1 or info.st_size < 2 * CHUNK_SIZE:
+                return scan_stream(data)
+            bounds = _split_ranges(data, jobs)
+
+    summary = TextSummary()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        names = [f.name] * (len(bounds) - 1)
+        for range_summary in executor.map(_scan_range, names, bounds, bounds[1:]):
+            summary += range_summary
+    return summary
+
+
+def scan_files(
+    paths: list[str], jobs: int | None = None, cache: bool = True
+) -> list[TextSummary]:
+    """
+    Summarize several files, in parallel when there's more than one. With
+    'cache', files that didn't change since they were last scanned aren't read.
+    """
+    if not cache:
+        return _scan_files(paths, jobs)
+
+    keys = []
+    for path in paths:
+        try:
+            keys.append(None if path == STDIN else file_key("text", os.stat(path)))
+        except OSError:
+            keys.append(None)
+
+    with Cache("counts") as results:
+        cached = results.get_many(key for key in keys if key is not None)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        scanned = _scan_files([paths[i] for i in missing], jobs)
+        results.put_many(
+            {
+                keys[i]: asdict(summary)
+                for i, summary in zip(missing, scanned)
+                if keys[i]
+            }
+        )
+
+    summaries = [TextSummary(**cached[key]) if key in cached else None for key in keys]
+    for i, summary in zip(missing, scanned):
+        summaries[i] = summary
+    return summaries
+
+
+def collect_files(paths: list[str]) -> list[str]:
+    """
+    Expand glob patterns and walk directories recursively, skipping hidden
+    entries. Raises FileNotFoundError for paths that don't exist.
+    """
+    files = []
+    for path in paths:
+        if path == STDIN:
+            files.append(path)
+            continue
+        if any(char in path for char in "*?["):
+            matches = sorted(glob.glob(path, recursive=True))
+            if not matches:
+                raise _not_found(path)
+        else:
+            matches = [path]
+
+        for match in matches:
+            if os.path.isdir(match):
+                files.extend(_walk(match))
+            elif os.path.exists(match):
+                files.append(match)
+            else:
+                raise _not_found(os.path.join(os.getcwd(), match))
+    return files
+
+
+def decompressed(f: BinaryIO, head: bytes) -> BinaryIO:
+    """Stream of the data decompressed, if 'head' starts with a known format."""
+    # magic number, deflate method and no reserved flags
+    if head.startswith(b"\x1f\x8b\x08") and len(head) > 3 and not head[3] & 0xE0:
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    # magic number, block size and the magic of the first block or of the end
+    if (
+        head.startswith(b"BZh")
+        and head[3:4].isdigit()
+        and head[3:4] != b"0"
+        and head[4:10] in (b"1AY&SY", b"\x17rE8P\x90")
+    ):
+        return bz2.BZ2File(f)
+    if head.startswith(b"\xfd7zXZ\x00"):
+        return lzma.LZMAFile(f)
+    return f
+
+
+def decompressed_stream(f: BinaryIO) -> BinaryIO:
+    """
+    Stream of the data of a buffered stream, decompressed if it starts with a
+    known format. Pipes may give the first bytes a few at a time, so they're
+    read until there are MAGIC_SIZE of them, or the data ends, to tell.
+    """
+    head = f.peek(MAGIC_SIZE)[:MAGIC_SIZE]
+    if len(head) < MAGIC_SIZE:
+        head = f.read(MAGIC_SIZE)
+        f = io.BufferedReader(_Prefixed(head, f), CHUNK_SIZE)
+    return decompressed(f, head)
+
+
+def scan_decompressed(stream: BinaryIO, path: str) -> TextSummary:
+    """
+    Summarize the stream from 'decompressed' of the file at 'path' (or the
+    standard input). Raises ScanError if the compressed data is truncated or
+    corrupt.
+    """
+    try:
+        return scan_stream(stream)
+    except (EOFError, lzma.LZMAError, OSError) as e:
+        if not isinstance(stream, (gzip.GzipFile, bz2.BZ2File, lzma.LZMAFile)):
+            raise
+        name = "the standard input" if path == STDIN else f"'{os.path.abspath(path)}'"
+        raise ScanError(f"{name} is truncated or corrupt ({e}).") from e
+
+
+class _Prefixed(io.RawIOBase):
+    # the data of a stream whose first bytes were already read from it
+    def __init__(self, head: bytes, rest: BinaryIO) -> None:
+        self._head = head
+        self._rest = rest
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:
+        if self._head:
+            data = self._head[: len(buffer)]
+            self._head = self._head[len(data) :]
+        else:
+            data = self._rest.read1(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _not_found(path: str) -> FileNotFoundError:
+    return FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+
+def iter_chunks(
+    source: BinaryIO | mmap.mmap, size: int | None = None, final: bool = True
+) -> Iterator[bytes]:
+    """
+    Read chunks that never split a UTF-8 sequence or a '\\r\\n' pair. If not
+    'final', the bytes that could still be completed by more data are left out.
+    """
+    carry = b""
+    while block := source.read(CHUNK_SIZE if size is None else min(CHUNK_SIZE, size)):
+        if size is not None:
+            size -= len(block)
+        block = carry + block
+        cut = _aligned_cut(block)
+        carry = block[cut:]
+        yield block[:cut]
+    if carry and final:
+        yield carry
+
+
+def _aligned_cut(block: bytes) -> int:
+    cut = len(block)
+    lead = cut - 1
+    while lead > 0 and lead > cut - 4 and block[lead] & 0xC0 == 0x80:
+        lead -= 1
+    if block[lead] >= 0xC0:
+        seq_len = 2 if block[lead] < 0xE0 else 3 if block[lead] < 0xF0 else 4
+        if lead + seq_len > cut:
+            cut = lead
+
+    if cut > 0 and block[cut - 1] == 0x0D:
+        cut -= 1
+    return cut
+
+
+def _align(data: mmap.mmap, pos: int) -> int:
+    while pos < len(data) and data[pos] & 0xC0 == 0x80:
+        pos += 1
+    if 0 < pos < len(data) and data[pos - 1] == 0x0D and data[pos] == 0x0A:
+        pos += 1
+    return pos
+
+
+def _split_ranges(data: mmap.mmap, jobs: int) -> list[int]:
+    size = len(data)
+    qt_ranges = min(jobs * 4, size // CHUNK_SIZE)
+    bounds = [0]
+    for i in range(1, qt_ranges):
+        pos = max(_align(data, size * i // qt_ranges), bounds[-1])
+        bounds.append(pos)
+    bounds.append(size)
+    return bounds
+
+
+def _scan_range(path: str, start: int, end: int) -> TextSummary:
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            data.seek(start)
+            return scan_stream(data, end - start)
+
+
+def _scan_files(paths: list[str], jobs: int | None) -> list[TextSummary]:
+    if len(paths) == 1:
+        return [scan_file(paths[0], jobs or os.cpu_count() or 1)]
+    if STDIN in paths:
+        # the standard input can only be read by this process
+        stdin_summary = scan_file(STDIN)
+        files = [path for path in paths if path != STDIN]
+        file_summaries = iter(_scan_files(files, jobs) if files else [])
+        return [
+            stdin_summary if path == STDIN else next(file_summaries) for path in paths
+        ]
+    if len(paths) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(paths) // ((jobs or os.cpu_count() or 1) * 8))
+            return list(executor.map(scan_file, paths, chunksize=chunksize))
+    return [scan_file(path) for path in paths]
+
+
+def _walk(directory: str) -> Iterator[str]:
+    pending = [directory]
+    while pending:
+        with os.scandir(pending.pop()) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file():
+                yield entry.path
+        pending.extend(reversed(subdirs))
@@ -0,0 +1,215 @@
+"""Recounting files as they change, using inotify on Linux and polling elsewhere."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+from .scan import (
+    MAGIC_SIZE,
+    TextSummary,
+    decompressed,
+    iter_chunks,
+    scan_bytes,
+    scan_decompressed,
+)
+
+POLL_INTERVAL = 1.0
+
+# bytes kept from before the scanned offset, to notice files that were rewritten
+_GUARD_SIZE = 64
+# time waited after a change for the changes that usually come right after it
+_SETTLE_SECS = 0.05
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_EVENT = struct.Struct("iIII")
+
+
+def watch_summaries(
+    files: list[str], interval: float = POLL_INTERVAL
+) -> Iterator[list[TextSummary]]:
+    """
+    Yield the summaries of the files, then yield them again every time some
+    of them change. Only the changed files are read again and, for files that
+    only had data appended, only the new data is read.
+    """
+    states = {file: _FileState(file) for file in files}
+    for state in states.values():
+        state.update()
+    yield [states[file].summary for file in files]
+
+    for changed in _changes(files, interval):
+        for file in changed:
+            states[file].update()
+        yield [states[file].summary for file in files]
+
+
+@dataclass
+class _FileState:
+    path: str
+    identity: tuple[int, int] | None = None
+    offset: int = 0
+    guard: bytes = b""
+    scanned: TextSummary = field(default_factory=TextSummary)
+    rest: TextSummary = field(default_factory=TextSummary)
+
+    @property
+    def summary(self) -> TextSummary:
+        """Summary of the whole file, as of the last update."""
+        return self.scanned + self.rest
+
+    def update(self) -> None:
+        """Scan what changed in the file since the last update."""
+        try:
+            with open(self.path, "rb") as f:
+                self._update(f)
+        except (FileNotFoundError, IsADirectoryError):
+            self._reset(None)
+
+    def _update(self, f: BinaryIO) -> None:
+        info = os.fstat(f.fileno())
+        identity = (info.st_dev, info.st_ino)
+        if not self._appended_to(f, identity, info.st_size):
+            self._reset(identity)
+
+        if self.offset == 0:
+            # the head of the file, however little of it the buffer has
+            stream = decompressed(f, os.pread(f.fileno(), MAGIC_SIZE, 0))
+            if stream is not f:
+                # compressed data can't be scanned from the middle
+                self.rest = scan_decompressed(stream, self.path)
+                return
+
+        f.seek(self.offset)
+        for chunk in iter_chunks(f, final=False):
+            self.scanned += scan_bytes(chunk)
+            self.offset += len(chunk)
+        # the bytes held back, which are counted until more data completes them
+        f.seek(self.offset)
+        self.rest = scan_bytes(f.read())
+
+        f.seek(max(self.offset - _GUARD_SIZE, 0))
+        self.guard = f.read(self.offset - f.tell())
+
+    def _appended_to(self, f: BinaryIO, identity: tuple[int, int], size: int) -> bool:
+        if identity != self.identity or size < self.offset:
+            return False
+        f.seek(self.offset - len(self.guard))
+        return f.read(len(self.guard)) == self.guard
+
+    def _reset(self, identity: tuple[int, int] | None) -> None:
+        self.identity = identity
+        self.offset = 0
+        self.guard = b""
+        self.scanned = TextSummary()
+        self.rest = TextSummary()
+
+
+def _changes(files: list[str], interval: float) -> Iterator[set[str]]:
+    try:
+        inotify = _Inotify(files)
+    except (OSError, AttributeError):
+        yield from _poll(files, interval)
+        return
+
+    with inotify:
+        while True:
+            changed = inotify.wait(None)
+            time.sleep(_SETTLE_SECS)
+            changed |= inotify.wait(0)
+            if changed:
+                yield changed
+
+
+def _poll(files: list[str], interval: float) -> Iterator[set[str]]:
+    signatures = {file: _signature(file) for file in files}
+    while True:
+        time.sleep(interval)
+        changed = set()
+        for file in files:
+            signature = _signature(file)
+            if signature != signatures[file]:
+                signatures[file] = signature
+                changed.add(file)
+        if changed:
+            yield changed
+
+
+def _signature(path: str) -> tuple[int, int, int] | None:
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_ino, info.st_size, info.st_mtime_ns
+
+
+class _Inotify:
+    """Linux inotify watches on the directories of a set of files."""
+
+    def __init__(self, files: list[str]) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # watching the directories also catches files that are replaced
+        self._files = {}
+        for file in files:
+            directory, name = os.path.split(os.path.abspath(file))
+            self._files.setdefault(directory, {})[os.fsencode(name)] = file
+
+        self._dirs = {}
+        mask = (
+            _IN_MODIFY
+            | _IN_ATTRIB
+            | _IN_CLOSE_WRITE
+            | _IN_MOVED_FROM
+            | _IN_MOVED_TO
+            | _IN_CREATE
+            | _IN_DELETE
+        )
+        for directory in self._files:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+            self._dirs[wd] = directory
+
+    def __enter__(self) -> "_Inotify":
+        return self
+
+    def __exit__(self, *_) -> None:
+        os.close(self._fd)
+
+    def wait(self, timeout: float | None) -> set[str]:
+        """Wait for events and return the watched files they refer to."""
+        changed = set()
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return changed
+
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+
+            pos = 0
+            while pos < len(data):
+                wd, _, _, name_len = _IN_EVENT.unpack_from(data, pos)
+                pos += _IN_EVENT.size
+                name = data[pos : pos + name_len].rstrip(b"\0")
+                pos += name_len
+                file = self._files.get(self._dirs.get(wd), {}).get(name)
+                if file is not None:
+                    changed.add(file)
@@ -0,0 +1,133 @@
+import io
+import itertools
+import random
+import unittest
+from unittest import mock
+
+from blossy import columns
+from blossy.command import calculate
+
+# expressions that can't fail for the rows, so they're calculated over columns
+EXPRESSIONS = [
+    "a + b",
+    "a - b",
+    "a * b",
+    "a * b / 2",
+    "(a + b) * (a - b) / 2",
+    "-a * b",
+    "a ^ 2 - b ^ 3",
+    "a / (b * b + 1)",
+    "r * a",
+    "r * -a + b",
+    "t1 - t0",
+    "r * (t1 - t0)",
+    "(t1 - t0) * a + t0",
+    "(t1 - t0) / (a * a + 1)",
+    "-(t0 + 1:30)",
+]
+# functions bound to the backend when the module is imported
+OPERATIONS = [
+    "add",
+    "subtract",
+    "multiply",
+    "divide",
+    "power",
+    "negate",
+    "add_times",
+    "subtract_times",
+    "scale_time",
+    "divide_time",
+    "negate_time",
+]
+
+
+def random_rows(quantity: int) -> list[dict[str, str]]:
+    rng = random.Random(0)
+    return [
+        {
+            "a": str(rng.randint(-5, 5)),
+            "b": str(rng.randint(-5, 5)),
+            "r": rng.choice(["0.0", "-0.0", "0.5", "-1.25", str(rng.uniform(-9, 9))]),
+            "t0": f"{rng.choice(['', '-'])}{rng.randint(0, 9)}:{rng.randint(0, 59):02}",
+            "t1": f"{rng.randint(0, 2)}:{rng.randint(0, 59):02}:{rng.randint(0, 59):02}",
+        }
+        for _ in range(quantity)
+    ]
+
+
+class TestColumns(unittest.TestCase):
+    def _backends(self):
+        yield columns._ArrayBackend()
+        if columns.np is not None:
+            yield columns._NumpyBackend()
+
+    def test_columns_match_rows(self):
+        rows = random_rows(2000)
+        for backend in self._backends():
+            operations = {name: getattr(backend, name) for name in OPERATIONS}
+            with mock.patch.multiple(columns, _backend=backend, **operations):
+                for expression in EXPRESSIONS:
+                    with self.subTest(backend=type(backend).__name__, expr=expression):
+                        tokens = list(
+                            calculate.VariableExpressionLexer().tokenize(expression)
+                        )
+                        names = {t.value for t in tokens if t.type == "NAME"}
+                        results = calculate._calculate_columns(
+                            tokens, names, rows, {}, calculate.Budget()
+                        )
+                        expected = [
+                            str(
+                                calculate._calculate_row(
+                                    tokens, names, row, calculate.Budget()
+                                )
+                            )
+                            for row in rows
+                        ]
+                        mismatches = [
+                            (row, result, value)
+                            for row, result, value in zip(rows, results, expected)
+                            if result != value
+                        ]
+                        self.assertEqual(mismatches, [])
+
+
+class TestCalculateTable(unittest.TestCase):
+    def test_errors_of_constant_parts_are_reported(self):
+        rows = [{"a": "1"}, {"a": "2"}]
+        for expression, message in (
+            ("a + 1/0", "division by zero"),
+            ("a + 1.5^100000", "out of range"),
+        ):
+            with self.subTest(expression=expression):
+                output, errors = io.StringIO(), io.StringIO()
+                with self.assertRaisesRegex(calculate.ParsingError, message):
+                    calculate.calculate_table(expression, rows, output, errors)
+                self.assertEqual(output.getvalue(), "")
+
+    def test_rows_over_the_digits_are_reported(self):
+        rows = [{"a": "1"}, {"a": "123"}, {"a": "0.5"}]
+        output, errors = io.StringIO(), io.StringIO()
+        budget = calculate.Budget(max_digits=5)
+        quantity = calculate.calculate_table(
+            "a * 1000", rows, output, errors, budget=budget
+        )
+        self.assertEqual(quantity, 1)
+        self.assertEqual(output.getvalue(), "1000\n\n500.0\n")
+        self.assertIn(
+            "Row 2: Operation * would give a number with over 5 digits",
+            errors.getvalue(),
+        )
+
+    def test_rows_over_the_time_are_reported(self):
+        rows = [{"a": "1"}, {"a": "2"}]
+        output, errors = io.StringIO(), io.StringIO()
+        budget = calculate.Budget(max_seconds=0.5)
+        # each reading of the clock is a second after the last one
+        clock = itertools.count()
+        with mock.patch.object(calculate.time, "monotonic", lambda: next(clock)):
+            quantity = calculate.calculate_table(
+                "a * 2", rows, output, errors, budget=budget
+            )
+        self.assertEqual(quantity, 2)
+        self.assertEqual(output.getvalue(), "\n\n")
+        self.assertIn("Row 1: Calculation took over 0.5 seconds", errors.getvalue())
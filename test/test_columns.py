@@ -0,0 +1,107 @@
+import random
+import unittest
+from unittest import mock
+
+from blossy import columns
+from blossy.command.calculate import Time
+from blossy.durations import parse_seconds
+
+# functions bound to the backend when the module is imported
+TIME_OPERATIONS = [
+    "add_times",
+    "subtract_times",
+    "scale_time",
+    "divide_time",
+    "negate_time",
+]
+
+
+def backends():
+    yield columns._ArrayBackend()
+    if columns.np is not None:
+        yield columns._NumpyBackend()
+
+
+def using(backend):
+    """Patch of the columns module calculating with 'backend'."""
+    operations = {name: getattr(backend, name) for name in TIME_OPERATIONS}
+    return mock.patch.multiple(columns, _backend=backend, **operations)
+
+
+class TestParseSeconds(unittest.TestCase):
+    def test_durations(self):
+        for text, seconds in (
+            ("1:02:03", 3723),
+            ("12:01", 721),
+            (" -0:03:00 ", -180),
+            ("-0:00", 0),
+            ("100:00:00", 360000),
+            ("0:75", 75),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(parse_seconds(text), seconds)
+
+    def test_invalid_durations(self):
+        for text in ("", "12", "1:2:3:4", "1:-2", "a:00", "1:²", "1 :00", "--1:00"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_seconds(text)
+
+
+class TestTimeVector(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.seconds = [rng.randint(-100000, 100000) for _ in range(1000)]
+        self.seconds += [0, 59, -59, 3600, -3601]
+        self.times = [Time.from_seconds(second) for second in self.seconds]
+
+    def assertTimes(self, vector: columns.TimeVector, times: list[Time]) -> None:
+        mismatches = [
+            (second, str(time))
+            for second, time in zip(vector, times)
+            if second != time.total_seconds
+        ]
+        self.assertEqual(mismatches, [])
+        self.assertEqual(len(vector), len(times))
+
+    def test_parse_and_format_match_time(self):
+        texts = list(map(str, self.times))
+        for backend in backends():
+            with self.subTest(backend=type(backend).__name__), using(backend):
+                vector = columns.TimeVector.parse(texts)
+                self.assertTimes(vector, self.times)
+                self.assertEqual(vector.format(), texts)
+
+    def test_sum(self):
+        for backend in backends():
+            with self.subTest(backend=type(backend).__name__), using(backend):
+                vector = columns.TimeVector.from_seconds(self.seconds)
+                self.assertEqual(vector.sum(), sum(self.seconds))
+
+    def test_operations_match_time(self):
+        reversed_times = self.times[::-1]
+        for backend in backends():
+            with self.subTest(backend=type(backend).__name__), using(backend):
+                vector = columns.TimeVector.from_seconds(self.seconds)
+                other = columns.TimeVector.from_seconds(self.seconds[::-1])
+                self.assertTimes(
+                    vector + other, [a + b for a, b in zip(self.times, reversed_times)]
+                )
+                self.assertTimes(
+                    vector - other, [a - b for a, b in zip(self.times, reversed_times)]
+                )
+                self.assertTimes(-vector, [Time() - time for time in self.times])
+                for factor in (3, -2, 0, 0.5, -1.25, 1 / 3):
+                    self.assertTimes(vector * factor, [t * factor for t in self.times])
+                    self.assertTimes(factor * vector, [factor * t for t in self.times])
+                for divisor in (3, -2, 0.5, 7.25):
+                    self.assertTimes(
+                        vector / divisor, [t / divisor for t in self.times]
+                    )
+
+    def test_division_by_zero(self):
+        for backend in backends():
+            with self.subTest(backend=type(backend).__name__), using(backend):
+                vector = columns.TimeVector.from_seconds(self.seconds)
+                with self.assertRaises(ArithmeticError):
+                    vector / 0
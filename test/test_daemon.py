@@ -0,0 +1,113 @@
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+
+import typer
+
+from blossy import client, daemon
+from blossy.main import app
+
+
+class TestRequests(unittest.TestCase):
+    def test_requests_are_decoded_as_encoded(self):
+        for argv, cwd, env in (
+            (["calc", "1+2"], "/home/user", {"HOME": "/home/user", "A": "b=c"}),
+            ([], "/", {}),
+            (["countl", "", "a\tb c"], "/tmp/ãé", {"EMPTY": ""}),
+            # names that aren't UTF-8 get through as surrogates
+            (["countc", os.fsdecode(b"\xff.txt")], os.fsdecode(b"/\xfe"), {}),
+        ):
+            with self.subTest(argv=argv, cwd=cwd, env=env):
+                data = client.encode_request(argv, cwd, env)
+                self.assertEqual(client.decode_request(data), (argv, cwd, env))
+
+
+class TestSocketChecks(unittest.TestCase):
+    def setUp(self):
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.path = os.path.join(temp.name, "private", "blossy.sock")
+
+    def _listen(self) -> None:
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(self.path)
+
+    def test_socket_of_the_user_is_trusted(self):
+        client.make_socket_dir(self.path)
+        self.assertEqual(os.stat(os.path.dirname(self.path)).st_mode & 0o777, 0o700)
+        self._listen()
+        client.check_socket(self.path)
+
+    def test_directory_others_can_write_to_is_untrusted(self):
+        client.make_socket_dir(self.path)
+        self._listen()
+        os.chmod(os.path.dirname(self.path), 0o770)
+        with self.assertRaises(client.UntrustedSocketError):
+            client.check_socket(self.path)
+        with self.assertRaises(client.UntrustedSocketError):
+            client.make_socket_dir(self.path)
+
+    def test_file_that_isnt_a_socket_is_untrusted(self):
+        client.make_socket_dir(self.path)
+        with open(self.path, "w"):
+            pass
+        with self.assertRaises(client.UntrustedSocketError):
+            client.check_socket(self.path)
+
+    def test_peer_of_the_user_is_trusted(self):
+        left, right = socket.socketpair()
+        with left, right:
+            client.check_peer(left)
+
+
+class TestHandle(unittest.TestCase):
+    def setUp(self):
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.directory = temp.name
+        self.command = typer.main.get_command(app)
+
+    def _request(self, argv: list[str], env: dict[str, str]) -> tuple[int, str]:
+        # sends the request like 'client._run', with files for the streams
+        conn, sock = socket.socketpair()
+        handler = threading.Thread(target=daemon._handle, args=(conn, self.command))
+        handler.start()
+        paths = [os.path.join(self.directory, name) for name in ("in", "out", "err")]
+        with open(paths[0], "w"):
+            pass
+        fds = [
+            os.open(path, os.O_RDONLY if i == 0 else os.O_WRONLY | os.O_CREAT)
+            for i, path in enumerate(paths)
+        ]
+        try:
+            with sock:
+                request = client.encode_request(argv, self.directory, env)
+                socket.send_fds(sock, [client.HEADER.pack(len(request)) + request], fds)
+                (pid,) = client.STATUS.unpack(client.recv_exactly(sock, 4))
+                (code,) = client.STATUS.unpack(client.recv_exactly(sock, 4))
+        finally:
+            for fd in fds:
+                os.close(fd)
+            handler.join()
+            conn.close()
+        self.assertEqual(pid, os.getpid())
+        with open(paths[1]) as f:
+            return code, f.read()
+
+    def test_command_runs_on_the_streams_sent(self):
+        code, output = self._request(["calc", "2*3+4^6"], {})
+        self.assertEqual((code, output), (0, "4102\n"))
+
+    def test_worker_is_left_as_it_was(self):
+        cwd, env = os.getcwd(), dict(os.environ)
+        max_str_digits = sys.get_int_max_str_digits()
+        argv = ["calc", "10^9999", "--max-digits", str(max_str_digits + 10000)]
+        code, output = self._request(argv, {"BLOSSY_TEST": "1"})
+        self.assertEqual(code, 0)
+        self.assertEqual(len(output), 10001)
+        self.assertEqual(sys.get_int_max_str_digits(), max_str_digits)
+        self.assertEqual((os.getcwd(), dict(os.environ)), (cwd, env))
@@ -0,0 +1,42 @@
+import unittest
+from unittest import mock
+
+from blossy import rand
+
+# ranges around the limits of NumPy's ints
+RANGES = [
+    (0, 255),
+    (3, 200),
+    (-5, 5),
+    (0, 2**32 - 1),
+    (-(2**63), 2**63 - 1),
+    (2**63 - 3, 2**63 + 3),
+    (2**64 - 5, 2**64 + 5),
+    (2**64 + 1, 2**64 + 5),
+    (-(2**64), -(2**64) + 1000),
+    (0, 2**70),
+]
+
+
+class TestUniform(unittest.TestCase):
+    def test_numpy_gives_the_same_numbers(self):
+        if rand._numpy() is None:
+            self.skipTest("NumPy isn't installed")
+        quantity = rand.NUMPY_MIN_SIZE + 1000
+        for lower, upper in RANGES:
+            with self.subTest(lower=lower, upper=upper):
+                distribution = rand.Uniform(lower, upper)
+                with_numpy = list(rand.generate(distribution, quantity, seed=1))
+                with mock.patch.object(rand, "_numpy", return_value=None):
+                    without_numpy = list(rand.generate(distribution, quantity, seed=1))
+                for numpy_block, block in zip(with_numpy, without_numpy):
+                    self.assertEqual(rand._to_list(numpy_block), rand._to_list(block))
+
+    def test_numbers_are_in_the_range(self):
+        for lower, upper in RANGES:
+            with self.subTest(lower=lower, upper=upper):
+                distribution = rand.Uniform(lower, upper)
+                for block in rand.generate(distribution, rand.NUMPY_MIN_SIZE, seed=1):
+                    numbers = rand._to_list(block)
+                    self.assertLessEqual(lower, min(numbers))
+                    self.assertLessEqual(max(numbers), upper)
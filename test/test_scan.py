@@ -0,0 +1,67 @@
+import gzip
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from blossy import scan
+
+
+class TestScanFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_text_like_a_magic_number_is_text(self):
+        for text in (b"BZh is a cool word\nline2\n", b"\x1f\x8b is not gzip\n"):
+            with self.subTest(text=text):
+                summary = scan.scan_file(self._write("text", text))
+                self.assertEqual(summary, scan.scan_bytes(text))
+
+    def test_compressed_file_is_decompressed(self):
+        text = b"".join(b"%d\n" % i for i in range(1000))
+        summary = scan.scan_file(self._write("text.gz", gzip.compress(text)))
+        self.assertEqual(summary, scan.scan_bytes(text))
+
+    def test_truncated_file_is_reported(self):
+        data = gzip.compress(b"".join(b"%d\n" % i for i in range(1000)))
+        path = self._write("text.gz", data[: len(data) // 2])
+        with self.assertRaisesRegex(scan.ScanError, "truncated or corrupt"):
+            scan.scan_file(path)
+
+
+class TestDecompressedStream(unittest.TestCase):
+    def _pipe(self, *parts: bytes):
+        # a pipe written a part at a time, like by a slow producer
+        read_fd, write_fd = os.pipe()
+
+        def write():
+            with open(write_fd, "wb", buffering=0) as f:
+                for part in parts:
+                    f.write(part)
+                    time.sleep(0.05)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        self.addCleanup(writer.join)
+        return open(read_fd, "rb")
+
+    def test_header_given_in_parts_is_detected(self):
+        data = gzip.compress(b"one\ntwo\n")
+        with self._pipe(data[:3], data[3:]) as f:
+            summary = scan.scan_stream(scan.decompressed_stream(f))
+        self.assertEqual(summary, scan.scan_bytes(b"one\ntwo\n"))
+
+    def test_short_text_is_kept_whole(self):
+        for parts in ((b"BZ", b"h is text\n"), (b"ab",), ()):
+            with self.subTest(parts=parts):
+                with self._pipe(*parts) as f:
+                    summary = scan.scan_stream(scan.decompressed_stream(f))
+                self.assertEqual(summary, scan.scan_bytes(b"".join(parts)))
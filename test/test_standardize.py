@@ -0,0 +1,191 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import typer
+
+from blossy import journal
+from blossy.command import standardize
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(quantity: int):
+    """os.rename, failing like an interruption after 'quantity' renames."""
+    rename = os.rename
+    done = 0
+
+    def interrupted_rename(old_path: str, new_path: str) -> None:
+        nonlocal done
+        if done == quantity:
+            raise Interrupted
+        done += 1
+        rename(old_path, new_path)
+
+    return mock.patch("os.rename", interrupted_rename)
+
+
+class DirectoryTestCase(unittest.TestCase):
+    def setUp(self):
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.directory = os.path.realpath(os.path.join(temp.name, "files"))
+        os.mkdir(self.directory)
+        state = mock.patch.dict(
+            os.environ, {"XDG_STATE_HOME": os.path.join(temp.name, "state")}
+        )
+        state.start()
+        self.addCleanup(state.stop)
+
+    def make_files(self, *names: str) -> None:
+        for name in names:
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write(name)
+
+    def contents(self) -> dict[str, str]:
+        """Contents of each file of the directory, by name."""
+        files = {}
+        for name in os.listdir(self.directory):
+            if os.path.isdir(os.path.join(self.directory, name)):
+                continue
+            with open(os.path.join(self.directory, name)) as f:
+                files[name] = f.read()
+        return files
+
+    def stddz(self, *args: str, **options) -> None:
+        standardize.execute(*args, **options)
+
+
+def run_plan(files: dict[str, str], renames: list[tuple[str, str]]) -> dict[str, str]:
+    """Contents by name of 'files' after the renames, none replacing a file."""
+    files = dict(files)
+    for old_name, new_name in renames:
+        if new_name in files:
+            raise AssertionError(f"{old_name} replaces {new_name}")
+        files[new_name] = files.pop(old_name)
+    return files
+
+
+class TestPlanRenames(unittest.TestCase):
+    def check_plan(self, targets: dict[str, str], qt_temp_names: int) -> None:
+        others = {"folder"}
+        renames = standardize._plan_renames(targets, others)
+        files = run_plan({name: name for name in targets}, renames)
+        self.assertEqual(files, {new: old for old, new in targets.items()})
+        # files already named correctly aren't renamed, and each cycle of
+        # renames takes one more
+        moves = sum(old != new for old, new in targets.items())
+        self.assertEqual(len(renames), moves + qt_temp_names)
+        temp_names = {new for _, new in renames} - set(targets.values())
+        self.assertEqual(len(temp_names), qt_temp_names)
+        self.assertFalse(temp_names & (set(targets) | others))
+
+    def test_chains_are_renamed_from_their_end(self):
+        self.check_plan({"a": "b", "b": "c", "c": "d", "e": "e"}, 0)
+        self.check_plan({"c": "d", "b": "c", "a": "b", "x": "y"}, 0)
+
+    def test_cycles_go_through_one_temporary_name(self):
+        self.check_plan({"a": "b", "b": "a"}, 1)
+        self.check_plan({"a": "b", "b": "c", "c": "a", "d": "d"}, 1)
+        self.check_plan({"a": "b", "b": "a", "c": "d", "d": "c", "e": "f"}, 2)
+
+    def test_shifted_ids(self):
+        # like giving every file the next ID
+        targets = {f"x-{i:03}": f"x-{i + 1:03}" for i in range(100)}
+        self.check_plan(targets, 0)
+        targets["x-100"] = "x-000"
+        self.check_plan(targets, 1)
+
+
+class TestJournal(DirectoryTestCase):
+    def test_interrupted_cycle_is_finished(self):
+        renames = [("a", ".T"), ("b", "a"), (".T", "b")]
+        for quantity in range(len(renames) + 1):
+            for sync_every in (1, 2, 1024):
+                with self.subTest(quantity=quantity, sync_every=sync_every):
+                    for name in os.listdir(self.directory):
+                        os.remove(os.path.join(self.directory, name))
+                    self.make_files("a", "b")
+                    with mock.patch.object(journal, "SYNC_EVERY", sync_every):
+                        written = journal.write_journal(self.directory, renames)
+                        with interrupt_after(quantity):
+                            try:
+                                journal.apply_journal(written)
+                            except Interrupted:
+                                pass
+                        resumed = journal.read_journal(self.directory)
+                        journal.resume_journal(resumed)
+                    self.assertEqual(self.contents(), {"a": "b", "b": "a"})
+                    self.assertTrue(journal.read_journal(self.directory).complete)
+
+
+class TestStandardize(DirectoryTestCase):
+    def test_interrupted_run_is_finished_by_the_next(self):
+        names = [f"photo {i}.png" for i in range(7)] + ["x-002.png", "x-9.png"]
+        self.make_files(*names)
+        self.stddz("x", self.directory)
+        expected = self.contents()
+        self.stddz(directory=self.directory, undo=True)
+
+        for quantity in range(8):
+            with self.subTest(quantity=quantity):
+                with mock.patch.object(journal, "SYNC_EVERY", 3):
+                    with interrupt_after(quantity):
+                        with self.assertRaises(Interrupted):
+                            self.stddz("x", self.directory)
+                    self.stddz("x", self.directory)
+                self.assertEqual(self.contents(), expected)
+                self.stddz(self.directory, undo=True)
+                self.assertEqual(set(self.contents()), set(names))
+
+    def test_files_named_with_the_ids_keep_them(self):
+        self.make_files("x-003.png", "x-001.txt", "x-001.png", "x-9.png", "a.png")
+        self.stddz("x", self.directory, start_idx=1)
+        self.assertEqual(
+            self.contents(),
+            {
+                "x-001.png": "x-001.png",
+                "x-002.png": "a.png",
+                "x-003.png": "x-003.png",
+                "x-004.txt": "x-001.txt",
+                "x-005.png": "x-9.png",
+            },
+        )
+
+    def test_other_entries_in_the_way(self):
+        self.make_files("a", "b")
+        os.mkdir(os.path.join(self.directory, "x-1"))
+        with self.assertRaisesRegex(typer.BadParameter, "in the way"):
+            self.stddz("x", self.directory, qt_digits=1)
+        self.assertEqual(set(self.contents()), {"a", "b"})
+
+    def test_undo_gives_back_the_names(self):
+        self.make_files("b.png", "a.png", "x-001.png", "c.txt")
+        before = self.contents()
+        self.stddz("x", self.directory)
+        self.assertEqual(
+            set(self.contents()), {"x-000.png", "x-001.png", "x-002.png", "x-003.txt"}
+        )
+        self.stddz(self.directory, undo=True)
+        self.assertEqual(self.contents(), before)
+
+    def test_nothing_to_undo(self):
+        with self.assertRaisesRegex(typer.BadParameter, "Nothing to undo"):
+            self.stddz(self.directory, undo=True)
+
+    def test_abandon_forgets_the_renames_left(self):
+        self.make_files("a", "b", "c")
+        with interrupt_after(1):
+            with self.assertRaises(Interrupted):
+                self.stddz("x", self.directory)
+        self.make_files("x-001")
+        with self.assertRaisesRegex(typer.BadParameter, "in the way"):
+            self.stddz("x", self.directory)
+
+        self.stddz(self.directory, abandon=True)
+        self.assertIsNone(journal.read_journal(self.directory))
+        self.stddz("x", self.directory)
+        self.assertEqual(len(self.contents()), 4)
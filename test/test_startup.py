@@ -0,0 +1,52 @@
+import subprocess
+import sys
+import unittest
+
+from blossy.main import COMMANDS
+
+# a command may take this many times as long to start as importing Typer alone
+BUDGET = 2.5
+# runs of each measure, of which the fastest is taken
+RUNS = 3
+# modules that take a while to load and are only imported when they're used
+DEFERRED = ("numpy",)
+
+LOAD_COMMAND = """
+import click
+import blossy.main
+from typer.main import get_command
+
+group = get_command(blossy.main.app)
+group.get_command(click.Context(group), {name!r})
+"""
+
+
+def import_times(code: str) -> dict[str, int]:
+    """Microseconds taken to import each module by running 'code'."""
+    times = {}
+    for _ in range(RUNS):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        run_times = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "[us]" not in line:
+                self_time, _, module = line.removeprefix("import time:").split("|")
+                run_times[module.strip()] = int(self_time)
+        if not times or sum(run_times.values()) < sum(times.values()):
+            times = run_times
+    return times
+
+
+class TestStartup(unittest.TestCase):
+    def test_commands_start_within_budget(self):
+        budget = BUDGET * sum(import_times("import typer").values())
+        for name in COMMANDS:
+            with self.subTest(command=name):
+                times = import_times(LOAD_COMMAND.format(name=name))
+                self.assertLessEqual(sum(times.values()), budget)
+                for module in DEFERRED:
+                    self.assertNotIn(module, times)
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from blossy import scan, watch
+
+# data ending in bytes that more data could complete
+TAILS = [b"abc\r", b"abc\r\n", "abç".encode()[:-1], b"a  b\n\n", b""]
+
+
+class TestWatchSummaries(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.txt")
+
+    def _write(self, data: bytes, mode: str = "wb") -> None:
+        with open(self.path, mode) as f:
+            f.write(data)
+
+    def test_first_count_matches_a_single_count(self):
+        for data in TAILS:
+            with self.subTest(data=data):
+                self._write(data)
+                summaries = next(watch.watch_summaries([self.path]))
+                self.assertEqual(summaries, [scan.scan_file(self.path)])
+
+    def test_appended_data_matches_a_single_count(self):
+        for data in TAILS:
+            with self.subTest(data=data):
+                self._write(b"line\r")
+                state = watch._FileState(self.path)
+                state.update()
+                self._write(data, "ab")
+                state.update()
+                self.assertEqual(state.summary, scan.scan_file(self.path))